@@ -60,3 +60,14 @@ Create the name of the service account to use
 {{- default "default" .Values.serviceAccount.name }}
 {{- end }}
 {{- end }}
+
+{{/*
+Render operator.stores as the PASS_STORES JSON object, pointing each store's key and passphrase at its mounted Secret.
+*/}}
+{{- define "pass-operator.stores" -}}
+{{- $stores := dict }}
+{{- range . }}
+{{- $_ := set $stores .name (dict "url" .url "branch" (.branch | default "main") "keyId" .keyId "keyFile" (printf "/etc/pass-operator/stores/%s/key" .name) "passphraseFile" (printf "/etc/pass-operator/stores/%s/passphrase" .name)) }}
+{{- end }}
+{{- toJson $stores }}
+{{- end }}
@@ -0,0 +1,212 @@
+#! /usr/bin/env python3
+"""
+Benchmark passoperator's decryption backends against a synthetic password store, both for throughput and for the
+latency of decrypting a single secret.
+
+A throwaway GnuPG home and key are generated in a temporary directory, so this doesn't touch your keyring.
+"""
+
+
+from typing import Dict, List
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+from pathlib import Path
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from statistics import median, quantiles
+
+import secrets
+
+
+def generate_store(root: Path, home: Path, entries: int, algo: str = 'rsa3072') -> List[Path]:
+    """
+    Generate a password store with random values, encrypted to a fresh key.
+
+    Args:
+        root (Path): directory to create the store in.
+        home (Path): GnuPG home directory to create the key in.
+        entries (int): number of entries to generate.
+        algo (str): algorithm of the generated key, as accepted by 'gpg --quick-gen-key'.
+
+    Returns:
+        List[Path]: pass store paths of the generated entries.
+    """
+    home.mkdir(mode=0o700, parents=True)
+
+    # Single algorithms, as opposed to gpg's presets, need to be told to create a key that can encrypt.
+    usage = 'default' if algo in ('default', 'future-default') else 'cert,sign,encr'
+
+    run(
+        ['gpg', '--homedir', str(home), '--batch', '--passphrase', '', '--quick-gen-key', 'benchmark <benchmark@localhost>', algo, usage, 'never'],
+        check=True,
+        capture_output=True
+    )
+
+    paths = []
+
+    for n in range(entries):
+        path = root / f'{n % 100:02d}' / f'entry-{n}'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'{secrets.token_urlsafe(32)}\n', encoding='utf-8')
+        paths.append(path)
+
+    # Encrypt in chunks to stay well under the argument length limit.
+    for n in range(0, entries, 500):
+        run(
+            ['gpg', '--homedir', str(home), '--batch', '--yes', '--trust-model', 'always', '-r', 'benchmark@localhost', '--encrypt-files', *map(str, paths[n:n + 500])],
+            check=True,
+            capture_output=True
+        )
+
+    for path in paths:
+        path.unlink()
+
+    return paths
+
+
+def export_key(home: Path) -> str:
+    """
+    Export the generated private key, as PASS_GPG_KEY would provide it.
+
+    Args:
+        home (Path): GnuPG home directory the key was generated in.
+
+    Returns:
+        str: the ASCII-armored private key.
+    """
+    return run(
+        ['gpg', '--homedir', str(home), '--batch', '--armor', '--export-secret-keys', 'benchmark@localhost'],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+
+
+def benchmark(paths: List[Path], home: Path, backend: str) -> float:
+    """
+    Decrypt every path in the store once with a particular backend.
+
+    Args:
+        paths (List[Path]): pass store paths.
+        home (Path): GnuPG home directory.
+        backend (str): value of PASS_DECRYPT_BACKEND.
+
+    Returns:
+        float: seconds taken.
+    """
+    # pylint: disable=import-outside-toplevel
+    from passoperator.gpg import decrypt_batch, load_private_key
+    from passoperator import env
+
+    env['PASS_DECRYPT_BACKEND'] = backend
+    workers = int(env['PASS_DECRYPT_THREADS'])
+    batch = int(env['PASS_DECRYPT_BATCH_SIZE'])
+
+    if backend == 'pgpy' and not load_private_key(export_key(home), '', home=home):
+        print('  pgpy is unavailable, so this measures the gpg fallback')
+
+    # Start the process pool, if there is one, and the gpg-agent ahead of time so neither is measured.
+    list(decrypt_batch(paths[:workers], home=home, workers=workers))
+
+    start = perf_counter()
+
+    # Submit the store in PassSecret-sized batches, as the operator would.
+    failures = sum(
+        decrypted.value is None
+        for n in range(0, len(paths), batch * workers)
+        for decrypted in decrypt_batch(paths[n:n + batch * workers], home=home, workers=workers)
+    )
+
+    elapsed = perf_counter() - start
+
+    if failures:
+        print(f'  {failures} entries failed to decrypt')
+
+    return elapsed
+
+
+def latency(paths: List[Path], home: Path, backend: str, samples: int) -> List[float]:
+    """
+    Decrypt paths in the store one at a time with a particular backend, as a PassSecret with a single key would.
+
+    Args:
+        paths (List[Path]): pass store paths.
+        home (Path): GnuPG home directory.
+        backend (str): value of PASS_DECRYPT_BACKEND.
+        samples (int): number of paths to decrypt.
+
+    Returns:
+        List[float]: seconds taken to decrypt each path.
+    """
+    # pylint: disable=import-outside-toplevel
+    from passoperator.gpg import decrypt_batch
+    from passoperator import env
+
+    env['PASS_DECRYPT_BACKEND'] = backend
+    timings = []
+
+    for path in paths[:samples]:
+        start = perf_counter()
+        list(decrypt_batch([path], home=home))
+        timings.append(perf_counter() - start)
+
+    return timings
+
+
+def main() -> int:
+    """
+    Run the benchmark.
+
+    Returns:
+        int: exit code.
+    """
+    parser = ArgumentParser(
+        description=__doc__,
+        formatter_class=ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        '--entries', type=int, nargs='+', default=[1000, 10000],
+        help='Sizes of the synthetic stores to benchmark.'
+    )
+
+    parser.add_argument(
+        '--backends', nargs='+', default=['thread', 'process', 'pgpy'],
+        help='Values of PASS_DECRYPT_BACKEND to compare.'
+    )
+
+    parser.add_argument(
+        '--samples', type=int, default=200,
+        help='Number of secrets to decrypt one at a time to measure per-secret latency.'
+    )
+
+    parser.add_argument(
+        '--algo', default='rsa3072',
+        help='Algorithm of the generated key. PGPy cannot decrypt the AEAD-encrypted messages that newer versions of gpg produce for future-default keys.'
+    )
+
+    args = parser.parse_args()
+
+    results: Dict[int, Dict[str, float]] = {}
+
+    for entries in args.entries:
+        with TemporaryDirectory(prefix='passoperator-benchmark-') as tmp:
+            print(f'Generating a store with {entries} entries')
+            paths = generate_store(Path(tmp) / 'store', Path(tmp) / 'gnupg', entries, args.algo)
+
+            for backend in args.backends:
+                results.setdefault(entries, {})[backend] = benchmark(paths, Path(tmp) / 'gnupg', backend)
+                print(f'  {backend:>8}: {results[entries][backend]:.2f}s ({results[entries][backend] / entries * 1000:.2f}ms/entry)')
+
+                timings = latency(paths, Path(tmp) / 'gnupg', backend, args.samples)
+
+                if len(timings) > 1:
+                    print(f'  {"":>8}  per-secret latency p50 {median(timings) * 1000:.2f}ms, p99 {quantiles(timings, n=100)[-1] * 1000:.2f}ms')
+
+            run(['gpgconf', '--homedir', str(Path(tmp) / 'gnupg'), '--kill', 'gpg-agent'], check=False)
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -23,21 +23,42 @@ log = logging.getLogger(__name__)
 
 env: Dict[str, str] = {
     # Environment variables to configure the operator (kopf).
-    'OPERATOR_INTERVAL':      os.getenv('OPERATOR_INTERVAL', '60'),
-    'OPERATOR_INITIAL_DELAY': os.getenv('OPERATOR_INITIAL_DELAY', '3'),
-    'OPERATOR_PRIORITY':      os.getenv('OPERATOR_PRIORITY', '100'),
-    'OPERATOR_NAMESPACE':     os.getenv('OPERATOR_NAMESPACE', 'default'),
-    'OPERATOR_POD_IP':        os.getenv('OPERATOR_POD_IP', '0.0.0.0'),
+    'OPERATOR_INTERVAL':             os.getenv('OPERATOR_INTERVAL', '60'),
+    'OPERATOR_INITIAL_DELAY':        os.getenv('OPERATOR_INITIAL_DELAY', '3'),
+    'OPERATOR_PRIORITY':             os.getenv('OPERATOR_PRIORITY', '100'),
+    'OPERATOR_NAMESPACE':            os.getenv('OPERATOR_NAMESPACE', 'default'),
+    'OPERATOR_POD_IP':               os.getenv('OPERATOR_POD_IP', '0.0.0.0'),
+    'OPERATOR_HTTP_PORT':            os.getenv('OPERATOR_HTTP_PORT', '8081'),
+    'OPERATOR_SWEEP':                os.getenv('OPERATOR_SWEEP', 'false').lower(),
+    'OPERATOR_API_POOL_SIZE':        os.getenv('OPERATOR_API_POOL_SIZE', '8'),
+    'OPERATOR_API_KEEPALIVE':        os.getenv('OPERATOR_API_KEEPALIVE', '30'),
+    'OPERATOR_API_CONNECT_TIMEOUT':  os.getenv('OPERATOR_API_CONNECT_TIMEOUT', '5'),
+    'OPERATOR_API_READ_TIMEOUT':     os.getenv('OPERATOR_API_READ_TIMEOUT', '30'),
 
     # Environment variables to configure pass.
-    'PASS_BINARY':            os.getenv('PASS_BINARY', '/usr/bin/pass'),
-    'PASS_DIRECTORY':         str(Path(f'~/.password-store/{os.getenv("PASS_DIRECTORY", "")}').expanduser()),
-    'PASS_GPG_PASSPHRASE':    os.getenv('PASS_GPG_PASSPHRASE', ''),
-    'PASS_GPG_KEY':           os.getenv('PASS_GPG_KEY', ''),
-    'PASS_GPG_KEY_ID':        os.getenv('PASS_GPG_KEY_ID', ''),
-    'PASS_GIT_URL':           os.getenv('PASS_GIT_URL', ''),
-    'PASS_GIT_BRANCH':        os.getenv('PASS_GIT_BRANCH', 'main'),
-    'PASS_DECRYPT_THREADS':   os.getenv('PASS_DECRYPT_THREADS', '4'),
+    'PASS_BINARY':                   os.getenv('PASS_BINARY', '/usr/bin/pass'),
+    'PASS_DIRECTORY':                str(Path(f'~/.password-store/{os.getenv("PASS_DIRECTORY", "")}').expanduser()),
+    'PASS_GPG_PASSPHRASE':           os.getenv('PASS_GPG_PASSPHRASE', ''),
+    'PASS_GPG_KEY':                  os.getenv('PASS_GPG_KEY', ''),
+    'PASS_GPG_KEY_ID':               os.getenv('PASS_GPG_KEY_ID', ''),
+    'PASS_GIT_URL':                  os.getenv('PASS_GIT_URL', ''),
+    'PASS_GIT_BRANCH':               os.getenv('PASS_GIT_BRANCH', 'main'),
+    'PASS_GIT_PULL_INTERVAL':        os.getenv('PASS_GIT_PULL_INTERVAL', os.getenv('OPERATOR_INTERVAL', '60')),
+    'PASS_GIT_BACKOFF_BASE':         os.getenv('PASS_GIT_BACKOFF_BASE', '1'),
+    'PASS_GIT_BACKOFF_CAP':          os.getenv('PASS_GIT_BACKOFF_CAP', '300'),
+    'PASS_GIT_STALE_AFTER':          os.getenv('PASS_GIT_STALE_AFTER', '300'),
+    'PASS_WEBHOOK_SECRET':           os.getenv('PASS_WEBHOOK_SECRET', ''),
+    'PASS_WEBHOOK_DEBOUNCE':         os.getenv('PASS_WEBHOOK_DEBOUNCE', '2'),
+    'PASS_GIT_SPARSE':               os.getenv('PASS_GIT_SPARSE', 'false').lower(),
+    'PASS_GIT_BARE':                 os.getenv('PASS_GIT_BARE', 'false').lower(),
+    'PASS_STORES':                   os.getenv('PASS_STORES', ''),
+    'PASS_DECRYPT_THREADS':          os.getenv('PASS_DECRYPT_THREADS', '4'),
+    'PASS_DECRYPT_BATCH_SIZE':       os.getenv('PASS_DECRYPT_BATCH_SIZE', '64'),
+    'PASS_DECRYPT_BACKEND':          os.getenv('PASS_DECRYPT_BACKEND', 'thread'),
+    'PASS_GPG_POOL_SIZE':            os.getenv('PASS_GPG_POOL_SIZE', os.getenv('PASS_DECRYPT_THREADS', '4')),
+    'PASS_DECRYPT_CACHE_BYTES':      os.getenv('PASS_DECRYPT_CACHE_BYTES', str(32 * 1024 ** 2)),
+    'PASS_DECRYPT_CACHE_TTL':        os.getenv('PASS_DECRYPT_CACHE_TTL', '0'),
+    'PASS_SESSION_KEY_CACHE_BYTES':  os.getenv('PASS_SESSION_KEY_CACHE_BYTES', '0'),
 }
 
 
@@ -47,7 +68,36 @@ try:
     float(env['OPERATOR_INITIAL_DELAY'])
     int(env['OPERATOR_PRIORITY'])
     IPv4Address(env['OPERATOR_POD_IP'])
+    int(env['OPERATOR_HTTP_PORT'])
+    int(env['OPERATOR_API_KEEPALIVE'])
+    float(env['OPERATOR_API_CONNECT_TIMEOUT'])
+    float(env['OPERATOR_API_READ_TIMEOUT'])
     int(env['PASS_DECRYPT_THREADS'])
+    int(env['PASS_DECRYPT_BATCH_SIZE'])
+    int(env['PASS_GPG_POOL_SIZE'])
+    int(env['PASS_DECRYPT_CACHE_BYTES'])
+    float(env['PASS_DECRYPT_CACHE_TTL'])
+    int(env['PASS_SESSION_KEY_CACHE_BYTES'])
+    float(env['PASS_GIT_PULL_INTERVAL'])
+    float(env['PASS_GIT_BACKOFF_BASE'])
+    float(env['PASS_GIT_BACKOFF_CAP'])
+    float(env['PASS_GIT_STALE_AFTER'])
+    float(env['PASS_WEBHOOK_DEBOUNCE'])
+
+    if int(env['OPERATOR_API_POOL_SIZE']) < 1:
+        raise ValueError(f'OPERATOR_API_POOL_SIZE must be at least 1, received "{env["OPERATOR_API_POOL_SIZE"]}"')
+
+    if env['OPERATOR_SWEEP'] not in ('true', 'false'):
+        raise ValueError(f'OPERATOR_SWEEP must be one of "true" or "false", received "{env["OPERATOR_SWEEP"]}"')
+
+    if env['PASS_GIT_SPARSE'] not in ('true', 'false'):
+        raise ValueError(f'PASS_GIT_SPARSE must be one of "true" or "false", received "{env["PASS_GIT_SPARSE"]}"')
+
+    if env['PASS_GIT_BARE'] not in ('true', 'false'):
+        raise ValueError(f'PASS_GIT_BARE must be one of "true" or "false", received "{env["PASS_GIT_BARE"]}"')
+
+    if env['PASS_DECRYPT_BACKEND'] not in ('thread', 'process', 'pgpy'):
+        raise ValueError(f'PASS_DECRYPT_BACKEND must be one of "thread", "process" or "pgpy", received "{env["PASS_DECRYPT_BACKEND"]}"')
 except (ValueError, AddressValueError) as e:
     log.error(e)
     sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""
+In-memory caches for data derived from the password store, such as decrypted values.
+"""
+
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterable, Set, Tuple
+from collections import OrderedDict
+from threading import RLock
+from time import monotonic
+
+from passoperator.git import on_head_change
+from passoperator import env
+
+import logging
+
+if TYPE_CHECKING:
+    from passoperator.stores import Store
+
+
+log = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    A thread-safe, least-recently-used cache that is bounded by the total size of the values it holds, with an
+    optional time-to-live on every entry.
+    """
+    def __init__(self, maxbytes: int, ttl: float = 0, sizeof: Callable[[Any], int] = len) -> None:
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = RLock()
+        self._entries: OrderedDict[Hashable, Tuple[Any, int, float]] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries and not self._expired(key)
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Retrieve a value from the cache, marking it as most-recently used.
+
+        Args:
+            key (Hashable): key of the value.
+
+        Returns:
+            Any | None: the cached value, or None if it isn't cached or has expired.
+        """
+        with self._lock:
+            if key not in self._entries or self._expired(key):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value in the cache, evicting least-recently used values until the cache fits its byte budget.
+        Values that are larger than the entire budget are not cached.
+
+        Args:
+            key (Hashable): key of the value.
+            value (Any): value to cache.
+        """
+        size = self.sizeof(value)
+
+        if size > self.maxbytes:
+            return None
+
+        with self._lock:
+            self._pop(key)
+
+            self._entries[key] = (value, size, monotonic())
+            self._bytes += size
+
+            while self._bytes > self.maxbytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+        return None
+
+    def retain(self, keys: Iterable[Hashable]) -> None:
+        """
+        Drop every entry whose key isn't in keys.
+
+        Args:
+            keys (Iterable[Hashable]): keys of the entries to keep.
+        """
+        keep = set(keys)
+
+        with self._lock:
+            for key in [key for key in self._entries if key not in keep]:
+                self._pop(key)
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Drop an entry from the cache, if it exists.
+
+        Args:
+            key (Hashable): key of the entry.
+        """
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        """
+        Drop every entry in the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache occupancy and effectiveness.
+
+        Returns:
+            Dict[str, int]: cache statistics.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxbytes': self.maxbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def _expired(self, key: Hashable) -> bool:
+        """
+        Check whether an entry has outlived the TTL, dropping it if so.
+
+        Args:
+            key (Hashable): key of the entry.
+
+        Returns:
+            bool: True if the entry expired.
+        """
+        if self.ttl > 0 and monotonic() - self._entries[key][2] > self.ttl:
+            self._pop(key)
+            return True
+
+        return False
+
+    def _pop(self, key: Hashable) -> None:
+        """
+        Remove an entry, if it exists, and release its bytes from the budget.
+
+        Args:
+            key (Hashable): key of the entry.
+        """
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+
+
+# b64enc'ed, decrypted values from the password store, keyed by the blob ID of their .gpg file.
+plaintexts = LRUCache(
+    maxbytes=int(env['PASS_DECRYPT_CACHE_BYTES']),
+    ttl=float(env['PASS_DECRYPT_CACHE_TTL'])
+)
+
+
+def _blob_ids(suffix: str = '') -> Set[str]:
+    """
+    Collect the blob IDs of the files in every store's current snapshot. The caches are shared between stores, since
+    a blob ID identifies the same encrypted file whichever store it's in.
+
+    Args:
+        suffix (str): only collect files whose names end with this suffix. (default: '')
+
+    Returns:
+        Set[str]: blob SHAs.
+    """
+    # Imported here, as passoperator.stores defines the stores from the environment on import.
+    from passoperator.stores import stores  # pylint: disable=import-outside-toplevel
+
+    blob_ids: Set[str] = set()
+
+    for passStore in stores.values():
+        with passStore.snapshots.acquire() as snapshot:
+            blob_ids |= snapshot.blob_ids(suffix)
+
+    return blob_ids
+
+
+@on_head_change
+def _invalidate_plaintexts(store: Store, old: str, new: str) -> None:
+    """
+    Drop decrypted values whose .gpg files are no longer in any store when a pull moves a store's HEAD.
+
+    Args:
+        store (Store): the store that was pulled.
+        old (str): previous HEAD commit SHA.
+        new (str): new HEAD commit SHA.
+    """
+    before = len(plaintexts)
+
+    plaintexts.retain(_blob_ids())
+
+    log.debug(f'Store "{store.name}" HEAD moved from {old} to {new}, invalidated {before - len(plaintexts)} cached decrypted values')
+
+
+# Session keys of .gpg files in the password store, keyed by the blob ID of the file.
+session_keys = LRUCache(
+    maxbytes=int(env['PASS_SESSION_KEY_CACHE_BYTES'])
+)
+
+# Blob IDs of each store's .gpg-id files, keyed by store name.
+_gpg_ids: Dict[str, Set[str]] = {}
+
+
+@on_head_change
+def _invalidate_session_keys(store: Store, old: str, new: str) -> None:
+    """
+    Drop session keys whose .gpg files are no longer in any store when a pull moves a store's HEAD, or every session
+    key if any of that store's .gpg-id changed, since its recipients are no longer the ones the keys were captured
+    under.
+
+    Args:
+        store (Store): the store that was pulled.
+        old (str): previous HEAD commit SHA.
+        new (str): new HEAD commit SHA.
+    """
+    with store.snapshots.acquire() as snapshot:
+        gpg_ids = snapshot.blob_ids(suffix='.gpg-id')
+
+    if store.name in _gpg_ids and gpg_ids != _gpg_ids[store.name]:
+        log.info(f'.gpg-id changed in store "{store.name}", invalidating all cached session keys')
+        session_keys.clear()
+    else:
+        session_keys.retain(_blob_ids())
+
+    _gpg_ids[store.name] = gpg_ids
@@ -3,19 +3,27 @@ A kubernetes operator that syncs and decrypts secrets from Linux password store
 """
 
 
-from typing import Any
+from typing import Any, Callable, Dict, List, Set, Tuple
 from pathlib import Path
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 from importlib import metadata
 from kubernetes import client, config
 from http import HTTPStatus
-from concurrent.futures import ThreadPoolExecutor
-from functools import partial
+from cattrs import structure as from_dict
+from humps import camelize
 
-from passoperator.git import pull, clone
+from passoperator.git import pull, clone, on_head_change, changed_paths, sparse_checkout_add
+from passoperator.gpg import pool as gpg_pool, load_private_key
+from passoperator.cache import plaintexts, session_keys
 from passoperator.utils import LogLevel
-from passoperator.secret import PassSecret, ManagedSecret
-from passoperator.locks import lock, drain_event_queues
+from passoperator.secret import MANAGED_LABEL, PassSecret, PassSecretSpec, ManagedSecret
+from passoperator.locks import lock, busy, drain_event_queues
+from passoperator.reverse_index import passsecrets
+from passoperator.informer import managed_secrets, to_dict
+from passoperator.kube import api_clients
+from passoperator.store import Snapshot
+from passoperator.stores import DEFAULT_STORE, Store, stores, get_store
+from passoperator import server
 from passoperator import env
 
 import asyncio
@@ -29,6 +37,10 @@ __version__ = metadata.version('pass-operator')
 log = logging.getLogger(__name__)
 
 
+# Number of objects to request per page when sweeping.
+SWEEP_PAGE_SIZE = 500
+
+
 @kopf.on.startup()
 def start(settings: kopf.OperatorSettings, **_: Any) -> None:
     """
@@ -38,6 +50,225 @@ def start(settings: kopf.OperatorSettings, **_: Any) -> None:
     settings.persistence.finalizer = 'secrets.premiscale.com/finalizer'
     settings.persistence.progress_storage = kopf.AnnotationsProgressStorage(prefix='secrets.premiscale.com')
 
+    if env['PASS_DECRYPT_BACKEND'] == 'pgpy':
+        load_private_key()
+
+        for passStore in stores.values():
+            if passStore.key_file is not None:
+                load_private_key(passStore.key_file.read_text(encoding='utf-8'), passStore.passphrase, passStore.home)
+
+
+# Pull loops of every store, and the sweep if it's enabled, running as tasks on kopf's event loop.
+_tasks: List[asyncio.Task] = []
+
+
+@kopf.on.startup()
+async def start_pulls(**_: Any) -> None:
+    """
+    Start each store's pull loop as a task on kopf's event loop, so they stop with the operator.
+    """
+    for passStore in stores.values():
+        _tasks.append(
+            asyncio.create_task(pull(passStore, daemon=True), name=f'pull-{passStore.name}')
+        )
+
+
+@kopf.on.startup()
+async def start_sweep(**_: Any) -> None:
+    """
+    Start sweeping PassSecrets every OPERATOR_INTERVAL, if OPERATOR_SWEEP is enabled.
+    """
+    if env['OPERATOR_SWEEP'] == 'true':
+        _tasks.append(asyncio.create_task(_sweep_loop(), name='sweep'))
+
+
+@kopf.on.cleanup()
+async def stop_tasks(**_: Any) -> None:
+    """
+    Cancel the stores' pull loops, killing any git commands they're running, and the sweep, and wait for them to stop.
+    """
+    for task in _tasks:
+        task.cancel()
+
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+    log.info('Stopped pulling password stores')
+
+
+@kopf.on.startup()
+async def start_server(**_: Any) -> None:
+    """
+    Serve the readiness endpoint, and the push webhook endpoint if a shared secret is configured to authenticate
+    pushes with, alongside the liveness endpoint. Without the webhook, the pull loop's polling is the only way changes
+    are picked up.
+    """
+    await server.start()
+
+
+@kopf.on.cleanup()
+async def stop_server(**_: Any) -> None:
+    """
+    Stop serving the readiness and push webhook endpoints.
+    """
+    await server.stop()
+
+
+@kopf.on.cleanup()
+def close_api_client(**_: Any) -> None:
+    """
+    Close the shared API client's pooled connections.
+    """
+    api_clients.close()
+
+
+@kopf.on.probe(id='git')
+def git_pull_stats(**_: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Report consecutive pull failures, the time of the last successful pull, how long the last pull took, and whether
+    the password store is stale on the liveness endpoint, for every store. A stale store doesn't fail liveness, as
+    restarting the operator can't fix an unreachable remote; it fails readiness instead.
+    """
+    return {name: passStore.scheduler.stats() for name, passStore in stores.items()}
+
+
+@kopf.on.probe(id='snapshots')
+def snapshot_stats(**_: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Report the commit of the published snapshot of every store, and how many snapshots and readers are live. More
+    than one live snapshot means reconciles are still finishing on a commit that a pull has since replaced.
+    """
+    return {name: passStore.snapshots.stats() for name, passStore in stores.items()}
+
+
+@kopf.on.probe(id='gpg')
+def gpg_pool_stats(**_: Any) -> Dict[str, int]:
+    """
+    Report how often pooled GPG contexts are reused versus created on the liveness endpoint.
+    """
+    return gpg_pool.stats()
+
+
+@kopf.on.probe(id='decrypt_cache')
+def decrypt_cache_stats(**_: Any) -> Dict[str, int]:
+    """
+    Report decrypted value cache occupancy and hit rate on the liveness endpoint.
+    """
+    return plaintexts.stats()
+
+
+@kopf.on.probe(id='session_key_cache')
+def session_key_cache_stats(**_: Any) -> Dict[str, int]:
+    """
+    Report session key cache occupancy and hit rate on the liveness endpoint.
+    """
+    return session_keys.stats()
+
+
+@kopf.on.probe(id='reverse_index')
+def reverse_index_stats(**_: Any) -> Dict[str, int]:
+    """
+    Report how many PassSecrets and store paths are indexed, and how many PassSecrets await reconciliation.
+    """
+    return passsecrets.stats()
+
+
+@kopf.on.probe(id='api_client')
+def api_client_stats(**_: Any) -> Dict[str, int | float]:
+    """
+    Report how many requests the shared API client has made, how many connections it holds open, and how often every
+    pooled connection was in use, on the liveness endpoint.
+    """
+    return api_clients.stats()
+
+
+@kopf.on.probe(id='secret_cache')
+def secret_cache_stats(**_: Any) -> Dict[str, int]:
+    """
+    Report how many managed Secrets are cached, and how often lookups are served from the cache.
+    """
+    return managed_secrets.stats()
+
+
+@kopf.on.startup()
+def prime_secret_cache(**_: Any) -> None:
+    """
+    List the managed Secrets in the operator's namespace into the cache once, before kopf starts watching them (see
+    inform). Kopf runs startup handlers to completion before it starts any watches, so nothing is missed in between.
+    """
+    managed_secrets.prime(
+        env['OPERATOR_NAMESPACE'],
+        [
+            to_dict(secret) for secret in _list_all(
+                api_clients.core().list_namespaced_secret,
+                namespace=env['OPERATOR_NAMESPACE'],
+                label_selector=f'{MANAGED_LABEL}=true'
+            )
+        ]
+    )
+
+
+@kopf.on.event('', 'v1', 'secrets', labels={MANAGED_LABEL: 'true'})
+def inform(type: str | None, body: kopf.Body, **_: Any) -> None:
+    """
+    Keep the cache of managed Secrets in step with the cluster.
+
+    Args:
+        type [str | None]: type of the watch event, or None while kopf is listing Secrets on startup.
+        body [kopf.Body]: raw body of the Secret.
+    """
+    if type == 'DELETED':
+        managed_secrets.remove(body['metadata']['namespace'], body['metadata']['name'])
+    else:
+        managed_secrets.update(body)
+
+
+@kopf.on.event('secrets.premiscale.com', 'v1alpha1', 'passsecret')
+def index(type: str | None, body: kopf.Body, **_: Any) -> None:
+    """
+    Keep the reverse index of store paths to PassSecrets in step with the cluster.
+
+    Args:
+        type [str | None]: type of the watch event, or None while kopf is listing PassSecrets on startup.
+        body [kopf.Body]: raw body of the PassSecret.
+    """
+    if type == 'DELETED':
+        passsecrets.remove(body)
+    else:
+        passsecrets.update(body)
+
+        # Make sure a sparse checkout of the store has everything this PassSecret refers to before it's decrypted.
+        try:
+            sparse_checkout_add(get_store(body['spec'].get('store')), body['spec']['encryptedData'].values())
+        except ValueError as e:
+            log.error(f'PassSecret "{body["metadata"]["name"]}": {e}')
+
+
+@on_head_change
+def reconcile_changed(store: Store, old: str, new: str) -> None:
+    """
+    Reconcile the PassSecrets that refer to .gpg files a pull changed, rather than waiting on their timers.
+
+    Args:
+        store (Store): the store that was pulled.
+        old (str): previous HEAD commit SHA.
+        new (str): new HEAD commit SHA.
+    """
+    changed = changed_paths(store, old, new)
+    affected = passsecrets.affected(changed, store.name)
+
+    log.info(
+        f'{len(changed)} .gpg files changed in store "{store.name}" between {old} and {new}, affecting {len(affected)} PassSecrets'
+    )
+
+    for body in affected:
+        try:
+            reconciliation(body=body)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # One malformed PassSecret mustn't stop the rest, or the store's pull loop. It stays dirty, so its timer
+            # will try again.
+            log.error(f'Failed to reconcile PassSecret "{body["metadata"]["name"]}": {e}')
+
 
 @kopf.timer(
     # Target PassSecret.secrets.premiscale.com/v1alpha1
@@ -47,7 +278,9 @@ def start(settings: kopf.OperatorSettings, **_: Any) -> None:
     # Initial delay in seconds before reviewing managed PassSecrets.
     initial_delay=float(env['OPERATOR_INITIAL_DELAY']),
     # Don't delay if the prior reconciliation hasn't completed.
-    sharp=True)
+    sharp=True,
+    # The sweep reconciles every PassSecret at once instead, if it's enabled.
+    when=lambda **_: env['OPERATOR_SWEEP'] != 'true')
 @lock(wait=False)
 def reconciliation(body: kopf.Body, **_: Any) -> None:
     """
@@ -55,16 +288,44 @@ def reconciliation(body: kopf.Body, **_: Any) -> None:
     is found. Kopf timers are triggered on an object-by-object basis, so this method will
     automatically revisit every PassSecret, iff it resides in the same namespace as the operator.
 
+    PassSecrets are only decrypted if a path they refer to changed, their spec changed, or their managed
+    Secret no longer matches what we last wrote to it. Otherwise, the store has nothing new for them.
+
     Args:
         body [kopf.Body]: raw body of the PassSecret.
     """
 
-    # Ensure the GPG key ID in ~/.password-store/${PASS_DIRECTORY}/.gpg-id did not change with the git update.
-    check_gpg_id(
-        path=f'{env["PASS_DIRECTORY"]}/.gpg-id'
-    )
+    try:
+        passStore = get_store(body['spec'].get('store'))
+    except ValueError as e:
+        raise kopf.PermanentError(e)
+
+    # Ensure the GPG key ID in the store's .gpg-id did not change with the git update.
+    with passStore.snapshots.acquire() as snapshot:
+        check_gpg_id(
+            path='.gpg-id',
+            store=snapshot,
+            key_id=passStore.key_id
+        )
+
+    v1 = api_clients.core()
+
+    # Read before decrypting anything, so a pull that lands mid-reconcile leaves the PassSecret dirty.
+    changes = passsecrets.changes(body)
 
-    v1 = client.CoreV1Api()
+    managedSecretMetadata = body['spec']['managedSecret']['metadata']
+
+    try:
+        secret = managed_secrets.get(
+            namespace=managedSecretMetadata.get('namespace', 'default'),
+            name=managedSecretMetadata['name']
+        )
+    except client.ApiException as e:
+        raise kopf.PermanentError(e)
+
+    if secret is not None and passsecrets.is_current(body, secret.get('data')):
+        log.info(f'Secret "{managedSecretMetadata["name"]}" is up-to-date, as nothing it refers to in the password store changed.')
+        return None
 
     # Create a new PassSecret object with an up-to-date managedSecret decrypted value from the pass store.
     passSecretObj = PassSecret.from_kopf(body)
@@ -74,45 +335,270 @@ def reconciliation(body: kopf.Body, **_: Any) -> None:
     )
 
     try:
-        secret = v1.read_namespaced_secret(
-            name=passSecretObj.spec.managedSecret.metadata.name,
-            namespace=passSecretObj.spec.managedSecret.metadata.namespace
-        )
+        if secret is None:
+            log.warning(f'Secret "{passSecretObj.spec.managedSecret.metadata.name}" not found. Recreating managed secret.')
 
-        log.debug(secret)
-        _managedSecret = ManagedSecret.from_kopf(secret.to_dict())
+            try:
+                managed_secrets.update(to_dict(v1.create_namespaced_secret(
+                    namespace=passSecretObj.spec.managedSecret.metadata.namespace,
+                    body=client.V1Secret(
+                        **passSecretObj.spec.managedSecret.to_client_dict(finalizers=False)
+                    )
+                )))
+            except client.ApiException as e:
+                # Secrets written before they were labelled aren't cached, so they're patched, which labels them.
+                if e.status != HTTPStatus.CONFLICT:
+                    raise
+
+                secret = to_dict(v1.read_namespaced_secret(
+                    name=passSecretObj.spec.managedSecret.metadata.name,
+                    namespace=passSecretObj.spec.managedSecret.metadata.namespace
+                ))
+
+        if secret is not None:
+            log.debug(secret)
+            _managedSecret = ManagedSecret.from_kopf(secret)
+
+            # If the managed secret data does not match what's in the newly-generated ManagedSecret object, or it
+            # isn't labelled as managed yet, submit a patch request to update it.
+            if not _managedSecret.data_equals(passSecretObj.spec.managedSecret) or \
+                    MANAGED_LABEL not in (secret['metadata'].get('labels') or {}):
+                if _managedSecret.immutable:
+                    raise kopf.TemporaryError(
+                        f'PassSecret "{passSecretObj.metadata.name}" managed secret "{passSecretObj.spec.managedSecret.metadata.name}" is immutable. Ignoring data patch.'
+                    )
 
-        # If the managed secret data does not match what's in the newly-generated ManagedSecret object,
-        # submit a patch request to update it.
-        if not _managedSecret.data_equals(passSecretObj.spec.managedSecret):
-            if _managedSecret.immutable:
-                raise kopf.TemporaryError(
-                    f'PassSecret "{passSecretObj.metadata.name}" managed secret "{passSecretObj.spec.managedSecret.metadata.name}" is immutable. Ignoring data patch.'
-                )
+                managed_secrets.update(to_dict(v1.patch_namespaced_secret(
+                    name=passSecretObj.spec.managedSecret.metadata.name,
+                    namespace=passSecretObj.spec.managedSecret.metadata.namespace,
+                    body=client.V1Secret(
+                        **passSecretObj.spec.managedSecret.to_client_dict(finalizers=False)
+                    )
+                )))
 
-            v1.patch_namespaced_secret(
-                name=passSecretObj.spec.managedSecret.metadata.name,
-                namespace=passSecretObj.spec.managedSecret.metadata.namespace,
-                body=client.V1Secret(
-                    **passSecretObj.spec.managedSecret.to_client_dict(finalizers=False)
-                )
-            )
+                log.info(f'Reconciliation successfully updated Secret "{_managedSecret.metadata.name}".')
+            else:
+                log.info(f'Secret "{_managedSecret.metadata.name}" is up-to-date.')
+    except client.ApiException as e:
+        raise kopf.PermanentError(e)
+
+    passsecrets.reconciled(body, passSecretObj.spec.managedSecret.data, changes)
+
+    return None
 
-            log.info(f'Reconciliation successfully updated Secret "{_managedSecret.metadata.name}".')
+
+def _list_all(list_fn: Callable[..., Any], **kwargs: Any) -> List[Any]:
+    """
+    Collect every item of a paginated list call.
+
+    Args:
+        list_fn (Callable[..., Any]): a kubernetes client list method.
+        kwargs (Any): arguments to the list method.
+
+    Returns:
+        List[Any]: items of every page.
+    """
+    items: List[Any] = []
+    token = None
+
+    while True:
+        page = list_fn(limit=SWEEP_PAGE_SIZE, _continue=token, **kwargs)
+
+        if isinstance(page, dict):
+            items.extend(page['items'])
+            token = page['metadata'].get('continue')
         else:
-            log.info(f'Secret "{_managedSecret.metadata.name}" is up-to-date.')
-    except client.ApiException as e:
-        if e.status == HTTPStatus.NOT_FOUND:
-            log.warning(f'Secret "{passSecretObj.spec.managedSecret.metadata.name}" not found. Recreating managed secret.')
+            items.extend(page.items)
+            token = page.metadata._continue
 
-            v1.create_namespaced_secret(
-                namespace=passSecretObj.spec.managedSecret.metadata.namespace,
-                body=client.V1Secret(
-                    **passSecretObj.spec.managedSecret.to_client_dict(finalizers=False)
-                )
-            )
+        if not token:
+            return items
+
+
+def sweep() -> Dict[str, int]:
+    """
+    Reconcile every PassSecret in the operator's namespace against the password stores in one pass, with a handful of
+    API calls however many PassSecrets there are. PassSecrets are listed once, and managed Secrets are read from the
+    cache (see SecretInformer), or listed once per unwatched namespace they're in, by their label. PassSecrets that
+    are current (see ReverseIndex.is_current) are skipped, the union of the paths the rest refer to is decrypted once
+    per store, and only the managed Secrets whose data differ are written.
+
+    PassSecrets that a handler is working on are left to it.
+
+    Returns:
+        Dict[str, int]: how many PassSecrets there were, how many were stale, how many paths were decrypted, and how
+            many Secrets were created or patched.
+    """
+    v1 = api_clients.core()
+
+    bodies = _list_all(
+        api_clients.custom().list_namespaced_custom_object,
+        group='secrets.premiscale.com',
+        version='v1alpha1',
+        namespace=env['OPERATOR_NAMESPACE'],
+        plural='passsecrets'
+    )
+
+    secrets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    # Managed Secrets in watched namespaces come from the cache, and the rest are listed.
+    for namespace in {body['spec']['managedSecret']['metadata'].get('namespace', 'default') for body in bodies}:
+        if managed_secrets.watches(namespace):
+            listed = managed_secrets.list(namespace)
         else:
-            raise kopf.PermanentError(e)
+            listed = [
+                to_dict(secret) for secret in
+                _list_all(v1.list_namespaced_secret, namespace=namespace, label_selector=f'{MANAGED_LABEL}=true')
+            ]
+
+        for secret in listed:
+            secrets[(namespace, secret['metadata']['name'])] = secret
+
+    stale: List[Tuple[Dict[str, Any], Dict[str, Any] | None, int]] = []
+
+    for body in bodies:
+        body.setdefault('kind', 'PassSecret')
+        managedSecretMetadata = body['spec']['managedSecret']['metadata']
+        secret = secrets.get((managedSecretMetadata.get('namespace', 'default'), managedSecretMetadata['name']))
+
+        if busy(body) or (secret is not None and passsecrets.is_current(body, secret.get('data'))):
+            continue
+
+        stale.append((body, secret, passsecrets.changes(body)))
+
+    # Decrypt every path the stale PassSecrets refer to once per store, however many of them refer to it.
+    paths: Dict[str, Set[str]] = {}
+
+    for body, _, _ in stale:
+        paths.setdefault(body['spec'].get('store') or DEFAULT_STORE, set()).update(body['spec']['encryptedData'].values())
+
+    values: Dict[str, Dict[str, str]] = {}
+
+    for name, storePaths in paths.items():
+        try:
+            passStore = get_store(name)
+        except ValueError as e:
+            log.error(e)
+            continue
+
+        with passStore.snapshots.acquire() as snapshot:
+            check_gpg_id(
+                path='.gpg-id',
+                store=snapshot,
+                key_id=passStore.key_id
+            )
+
+        values[name] = PassSecretSpec.decrypt_data({path: path for path in storePaths}, name)
+
+    stats = {
+        'passsecrets': len(bodies),
+        'stale': len(stale),
+        'decrypted': sum(len(storePaths) for storePaths in paths.values()),
+        'created': 0,
+        'patched': 0
+    }
+
+    for body, secret, changes in stale:
+        storeValues = values.get(body['spec'].get('store') or DEFAULT_STORE)
+
+        if storeValues is None:
+            continue
+
+        try:
+            written = _sweep_write(body, secret, storeValues, changes)
+        except client.ApiException as e:
+            # The PassSecret stays dirty, so the next sweep will try again.
+            log.error(f'Failed to reconcile PassSecret "{body["metadata"]["name"]}": {e}')
+            continue
+
+        if written:
+            stats[written] += 1
+
+    log.info(
+        f'Swept {stats["passsecrets"]} PassSecrets: {stats["stale"]} stale, {stats["decrypted"]} paths decrypted, '
+        f'{stats["created"]} Secrets created and {stats["patched"]} patched'
+    )
+
+    return stats
+
+
+def _sweep_write(body: Dict[str, Any], secret: Dict[str, Any] | None, values: Dict[str, str], changes: int) -> str | None:
+    """
+    Write a stale PassSecret's managed Secret, if its data differ from the store's.
+
+    Args:
+        body (Dict[str, Any]): raw body of the PassSecret.
+        secret (Dict[str, Any] | None): raw body of the managed Secret, or None if it wasn't listed.
+        values (Dict[str, str]): b64enc'ed values of the PassSecret's store, keyed by path.
+        changes (int): the PassSecret's changes before its paths were decrypted (see ReverseIndex.changes).
+
+    Returns:
+        str | None: 'created' or 'patched' if the Secret was written, or None if it was already up-to-date.
+
+    Raises:
+        client.ApiException: if the Secret couldn't be written.
+    """
+    ms = from_dict(dict(camelize(dict(body['spec']['managedSecret']))), ManagedSecret)
+    managedSecret = ManagedSecret(
+        metadata=ms.metadata,
+        data={secretKey: values.get(secretPath, '') for secretKey, secretPath in body['spec']['encryptedData'].items()},
+        immutable=ms.immutable,
+        type=ms.type
+    )
+
+    written = None
+
+    if secret is None:
+        try:
+            managed_secrets.update(to_dict(api_clients.core().create_namespaced_secret(
+                namespace=managedSecret.metadata.namespace,
+                body=client.V1Secret(**managedSecret.to_client_dict(finalizers=False))
+            )))
+            written = 'created'
+        except client.ApiException as e:
+            # Secrets written before they were labelled aren't listed, so they're patched, which labels them.
+            if e.status != HTTPStatus.CONFLICT:
+                raise
+
+            secret = to_dict(api_clients.core().read_namespaced_secret(
+                name=managedSecret.metadata.name,
+                namespace=managedSecret.metadata.namespace
+            ))
+
+    if secret is not None and (
+            (secret.get('data') or {}) != managedSecret.data or MANAGED_LABEL not in (secret['metadata'].get('labels') or {})):
+        if secret.get('immutable'):
+            log.error(
+                f'PassSecret "{body["metadata"]["name"]}" managed secret "{managedSecret.metadata.name}" is immutable. Ignoring data patch.'
+            )
+            return None
+
+        managed_secrets.update(to_dict(api_clients.core().patch_namespaced_secret(
+            name=managedSecret.metadata.name,
+            namespace=managedSecret.metadata.namespace,
+            body=client.V1Secret(**managedSecret.to_client_dict(finalizers=False))
+        )))
+        written = 'patched'
+
+    passsecrets.reconciled(body, managedSecret.data, changes)
+
+    return written
+
+
+async def _sweep_loop() -> None:
+    """
+    Sweep PassSecrets every OPERATOR_INTERVAL, after OPERATOR_INITIAL_DELAY, until cancelled. Sweeps block on the
+    Kubernetes API and gpg, so they're run in a thread.
+    """
+    await asyncio.sleep(float(env['OPERATOR_INITIAL_DELAY']))
+
+    while True:
+        try:
+            await asyncio.to_thread(sweep)
+        except (client.ApiException, kopf.PermanentError, kopf.TemporaryError) as e:
+            log.error(f'Sweep failed: {e}')
+
+        await asyncio.sleep(float(env['OPERATOR_INTERVAL']))
 
 
 @kopf.on.cleanup()
@@ -120,33 +606,61 @@ def cleanup(**_) -> None:
     drain_event_queues()
 
 
-def lookup_managing_passsecret(managedSecretName: str) -> PassSecret | None:
+@kopf.index('secrets.premiscale.com', 'v1alpha1', 'passsecret')
+def managed_secret_index(body: kopf.Body, **_: Any) -> Dict[Tuple[str, str], Tuple[str, str]]:
     """
-    Look up a PassSecret object by name and namespace.
+    Index PassSecrets by the namespace and name of the Secret they manage. Kopf keeps the index in step with the
+    cluster, and passes it to handlers that ask for it by this function's name.
 
     Args:
+        body [kopf.Body]: raw body of the PassSecret.
+
+    Returns:
+        Dict[Tuple[str, str], Tuple[str, str]]: the managed Secret's namespace and name, mapped to the PassSecret's.
+    """
+    managedSecretMetadata = body['spec']['managedSecret']['metadata']
+
+    return {
+        (managedSecretMetadata.get('namespace', 'default'), managedSecretMetadata['name']):
+            (body['metadata']['namespace'], body['metadata']['name'])
+    }
+
+
+def lookup_managing_passsecret(managed_secret_index: kopf.Index, managedSecretName: str,
+                               managedSecretNamespace: str = 'default') -> Dict[str, Any] | None:
+    """
+    Look up the PassSecret that manages a Secret, in constant time. The PassSecret's raw body is returned, rather than
+    a PassSecret object, as structuring one decrypts its data; callers that need it can pass the body to
+    PassSecret.from_kopf.
+
+    Args:
+        managed_secret_index [kopf.Index]: the index kopf maintains with managed_secret_index.
         managedSecretName [str]: name of the managed Secret to look up a PassSecret by, if it exists.
+        managedSecretNamespace [str]: namespace of the managed Secret. (default: 'default')
 
     Returns:
-        PassSecret | None: the PassSecret object if found, else None.
+        Dict[str, Any] | None: raw body of the PassSecret if found, else None.
     """
-    v1 = client.CustomObjectsApi()
+    for key in managed_secret_index.get((managedSecretNamespace, managedSecretName), []):
+        body = passsecrets.body(key)
 
-    try:
-        passSecrets = v1.list_namespaced_custom_object(
-            group='secrets.premiscale.com',
-            version='v1alpha1',
-            namespace=env['OPERATOR_NAMESPACE'],
-            plural='passsecrets'
-        )
+        if body is not None:
+            return body
 
-        for passSecret in passSecrets['items']:
-            if passSecret['spec']['managedSecret']['metadata']['name'] == managedSecretName:
-                return PassSecret.from_kopf(passSecret)
-        else:
-            return None
-    except client.ApiException as e:
-        raise kopf.PermanentError(e)
+        # The reverse index hasn't seen this PassSecret's event yet.
+        try:
+            return api_clients.custom().get_namespaced_custom_object(
+                group='secrets.premiscale.com',
+                version='v1alpha1',
+                namespace=key[0],
+                plural='passsecrets',
+                name=key[1]
+            )
+        except client.ApiException as e:
+            if e.status != HTTPStatus.NOT_FOUND:
+                raise kopf.PermanentError(e)
+
+    return None
 
 
 @kopf.on.update('secrets.premiscale.com', 'v1alpha1', 'passsecret')
@@ -192,7 +706,7 @@ def update(old: kopf.BodyEssence | Any, new: kopf.BodyEssence | Any, meta: kopf.
     except (ValueError, KeyError) as e:
         raise kopf.PermanentError(e)
 
-    v1 = client.CoreV1Api()
+    v1 = api_clients.core()
 
     # Handle typically immutable field changes separately from the rest of the manifest on Secrets.
     try:
@@ -202,22 +716,23 @@ def update(old: kopf.BodyEssence | Any, new: kopf.BodyEssence | Any, meta: kopf.
                 name=oldPassSecret.spec.managedSecret.metadata.name,
                 namespace=oldPassSecret.spec.managedSecret.metadata.namespace
             )
+            managed_secrets.remove(oldPassSecret.spec.managedSecret.metadata.namespace, oldPassSecret.spec.managedSecret.metadata.name)
 
-            v1.create_namespaced_secret(
+            managed_secrets.update(to_dict(v1.create_namespaced_secret(
                 namespace=newPassSecret.spec.managedSecret.metadata.namespace,
                 body=client.V1Secret(
                     **newPassSecret.spec.managedSecret.to_client_dict(finalizers=False)
                 )
-            )
+            )))
         else:
             # Name and namespace are the same, but the secret's being updated in-place.
-            v1.patch_namespaced_secret(
+            managed_secrets.update(to_dict(v1.patch_namespaced_secret(
                 name=newPassSecret.metadata.name,
                 namespace=oldPassSecret.metadata.namespace,
                 body=client.V1Secret(
                     **newPassSecret.spec.managedSecret.to_client_dict(finalizers=False)
                 )
-            )
+            )))
 
         log.info(
             f'Successfully updated PassSecret "{newPassSecret.metadata.name}" managed Secret "{newPassSecret.spec.managedSecret.metadata.name}".'
@@ -243,15 +758,15 @@ def create(body: kopf.Body, **_: Any) -> None:
 
     log.info(f'PassSecret "{passSecretObj.metadata.name}" created')
 
-    v1 = client.CoreV1Api()
+    v1 = api_clients.core()
 
     try:
-        v1.create_namespaced_secret(
+        managed_secrets.update(to_dict(v1.create_namespaced_secret(
             namespace=passSecretObj.spec.managedSecret.metadata.namespace,
             body=client.V1Secret(
                 **passSecretObj.spec.managedSecret.to_client_dict(finalizers=False)
             )
-        )
+        )))
 
         log.info(
             f'Created PassSecret "{passSecretObj.metadata.name}" managed Secret "{passSecretObj.spec.managedSecret.metadata.name}" in Namespace "{passSecretObj.spec.managedSecret.metadata.namespace}"'
@@ -280,13 +795,14 @@ def delete(body: kopf.Body, **_: Any) -> None:
 
     log.info(f'PassSecret "{passSecretObj.metadata.name}" deleted')
 
-    v1 = client.CoreV1Api()
+    v1 = api_clients.core()
 
     try:
         v1.delete_namespaced_secret(
             name=passSecretObj.spec.managedSecret.metadata.name,
             namespace=passSecretObj.spec.managedSecret.metadata.namespace
         )
+        managed_secrets.remove(passSecretObj.spec.managedSecret.metadata.namespace, passSecretObj.spec.managedSecret.metadata.name)
         log.info(f'Deleted PassSecret "{passSecretObj.metadata.name}" managed Secret "{passSecretObj.spec.managedSecret.metadata.name}" in Namespace "{passSecretObj.spec.managedSecret.metadata.namespace}"')
     except client.ApiException as e:
         if e.status == HTTPStatus.NOT_FOUND:
@@ -294,27 +810,60 @@ def delete(body: kopf.Body, **_: Any) -> None:
         raise kopf.PermanentError(e)
 
 
-def check_gpg_id(path: Path | str, remove: bool =False) -> None:
+def list_passsecret_paths(store: str = DEFAULT_STORE) -> Set[str]:
+    """
+    Collect the pass store paths referred to by every PassSecret in the operator's namespace, before kopf starts.
+
+    Args:
+        store (str): only collect the paths of PassSecrets that select this store. (default: 'default')
+
+    Returns:
+        Set[str]: pass store paths, relative to the root of the store.
+    """
+    v1 = api_clients.custom()
+
+    passSecrets = v1.list_namespaced_custom_object(
+        group='secrets.premiscale.com',
+        version='v1alpha1',
+        namespace=env['OPERATOR_NAMESPACE'],
+        plural='passsecrets'
+    )
+
+    return {
+        path for passSecret in passSecrets['items'] for path in passSecret['spec']['encryptedData'].values()
+        if (passSecret['spec'].get('store') or DEFAULT_STORE) == store
+    }
+
+
+def check_gpg_id(path: Path | str, remove: bool =False, store: Snapshot | None =None, key_id: str | None =None) -> None:
     """
     Ensure the gpg ID exists (leftover from 'pass init' in the entrypoint, or a git clone) and its contents match PASS_GPG_KEY_ID.
 
     Args:
         path [Path]: Path-like object to the .gpg-id file.
         remove [bool]: indicate whether or not to remove this file, should it exist.
+        store [Snapshot | None]: snapshot of the store to read the file from, with path relative to its root, rather
+            than the filesystem. remove is ignored if this is set.
+        key_id [str | None]: the key ID the file should contain. (default: PASS_GPG_KEY_ID)
     """
-    if Path(path).exists():
-        with open(path, mode='r', encoding='utf-8') as gpg_id_f:
-            _gpg_id = gpg_id_f.read().rstrip()
-            if _gpg_id != env['PASS_GPG_KEY_ID']:
-                log.error(f'PASS_GPG_KEY_ID ({env["PASS_GPG_KEY_ID"]}) does not equal .gpg-id contained in {path}: {_gpg_id}')
-                sys.exit(1)
+    key_id = env['PASS_GPG_KEY_ID'] if key_id is None else key_id
 
-        if remove:
-            Path(path).unlink(missing_ok=False)
-    else:
+    try:
+        if store is not None:
+            _gpg_id = store.read(path, suffix='').decode('utf-8').rstrip()
+        else:
+            _gpg_id = Path(path).read_text(encoding='utf-8').rstrip()
+    except FileNotFoundError:
         log.error(f'.gpg-id at "{path}" does not exist. pass init failure')
         sys.exit(1)
 
+    if _gpg_id != key_id:
+        log.error(f'GPG key ID ({key_id}) does not equal .gpg-id contained in {path}: {_gpg_id}')
+        sys.exit(1)
+
+    if remove and store is None:
+        Path(path).unlink(missing_ok=False)
+
 
 def main() -> int:
     """
@@ -389,33 +938,29 @@ def main() -> int:
         remove=True
     )
 
-    clone()
-
-    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='operator') as executor:
-        threads = [
-            executor.submit(
-                # Start kopf in its event loop in another thread on this process.
-                # https://kopf.readthedocs.io/en/stable/embedding/
-                lambda: asyncio.run(
-                    kopf.operator(
-                        # https://kopf.readthedocs.io/en/stable/packages/kopf/#kopf.run
-                        priority=int(env['OPERATOR_PRIORITY']),
-                        standalone=True,
-                        namespace=env['OPERATOR_NAMESPACE'],
-                        clusterwide=False,
-                        liveness_endpoint=f'http://{env["OPERATOR_POD_IP"]}:8080/healthz'
-                    )
-                )
-            ),
-            executor.submit(
-                partial(
-                    pull,
-                    daemon=True
-                )
-            )
-        ]
+    for passStore in stores.values():
+        try:
+            passStore.import_key()
+        except (OSError, ValueError) as e:
+            log.error(e)
+            sys.exit(1)
+
+        clone(
+            passStore,
+            sparse_paths=list_passsecret_paths(passStore.name) if env['PASS_GIT_SPARSE'] == 'true' else None
+        )
 
-        for thread in threads:
-            thread.result()
+    # Run kopf in the main thread, so it handles SIGTERM and SIGINT by running its cleanup handlers, which stop the
+    # stores' pull loops (see start_pulls).
+    asyncio.run(
+        kopf.operator(
+            # https://kopf.readthedocs.io/en/stable/packages/kopf/#kopf.run
+            priority=int(env['OPERATOR_PRIORITY']),
+            standalone=True,
+            namespace=env['OPERATOR_NAMESPACE'],
+            clusterwide=False,
+            liveness_endpoint=f'http://{env["OPERATOR_POD_IP"]}:8080/healthz'
+        )
+    )
 
     return 0
\ No newline at end of file
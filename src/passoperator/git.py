@@ -3,61 +3,503 @@ Methods to interact minimally with a Git repository.
 """
 
 
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Set
+from pathlib import Path, PurePosixPath
+from threading import Lock
 from git import Repo
-from git.exc import CommandError
-from time import sleep
+from git.exc import CommandError, GitCommandError
+from time import perf_counter, time
 from passoperator import env
 
+import asyncio
 import logging
+import os
+import random
 import sys
 
 
 log = logging.getLogger(__name__)
 
 
-def clone() -> None:
+if TYPE_CHECKING:
+    from passoperator.stores import Store
+
+
+HeadChangeListener = Callable[['Store', str, str], None]
+
+_head_change_listeners: List[HeadChangeListener] = []
+
+
+class PullScheduler:
+    """
+    Decide how long the pull loop waits between pulls, and track how healthy pulls of the password store are.
+
+    After a successful pull the loop waits PASS_GIT_PULL_INTERVAL seconds. After consecutive failures it backs off
+    exponentially from PASS_GIT_BACKOFF_BASE seconds up to PASS_GIT_BACKOFF_CAP seconds, waiting a random time between
+    half and all of the backoff, so that replicas pulling from the same remote don't retry in lockstep. The store is
+    stale once it hasn't been pulled successfully in PASS_GIT_STALE_AFTER seconds.
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.failures = 0
+        self.last_success: float | None = None
+        self.last_duration: float | None = None
+
+    def succeeded(self, duration: float) -> None:
+        """
+        Record a successful pull (or clone), resetting the backoff.
+
+        Args:
+            duration (float): seconds the pull took.
+        """
+        with self._lock:
+            self.failures = 0
+            self.last_success = time()
+            self.last_duration = duration
+
+    def failed(self, duration: float) -> None:
+        """
+        Record a failed pull, backing off further.
+
+        Args:
+            duration (float): seconds the pull took to fail.
+        """
+        with self._lock:
+            self.failures += 1
+            self.last_duration = duration
+
+    def backoff(self) -> float:
+        """
+        Get the upper bound on the wait before the next retry, given the number of consecutive failures.
+
+        Returns:
+            float: seconds, or 0 if the last pull succeeded.
+        """
+        if not self.failures:
+            return 0.0
+
+        # Cap the exponent as well, so that a long outage can't overflow the float.
+        return min(float(env['PASS_GIT_BACKOFF_CAP']), float(env['PASS_GIT_BACKOFF_BASE']) * 2 ** min(self.failures - 1, 64))
+
+    def delay(self) -> float:
+        """
+        Get the number of seconds to wait before the next pull.
+
+        Returns:
+            float: PASS_GIT_PULL_INTERVAL if the last pull succeeded, otherwise a jittered backoff.
+        """
+        with self._lock:
+            if not self.failures:
+                return float(env['PASS_GIT_PULL_INTERVAL'])
+
+            backoff = self.backoff()
+
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def stale(self) -> bool:
+        """
+        Check whether the password store has gone too long without a successful pull.
+
+        Returns:
+            bool: True if the store has never been pulled, or not within PASS_GIT_STALE_AFTER seconds.
+        """
+        return self.last_success is None or time() - self.last_success > float(env['PASS_GIT_STALE_AFTER'])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the health of pulls of the password store.
+
+        Returns:
+            Dict[str, Any]: pull statistics.
+        """
+        with self._lock:
+            return {
+                'failures': self.failures,
+                'last_success': self.last_success,
+                'last_duration': self.last_duration,
+                'backoff': self.backoff(),
+                'stale': self.stale()
+            }
+
+
+def on_head_change(listener: HeadChangeListener) -> HeadChangeListener:
+    """
+    Decorator to register a function that's called with a store, and its old and new HEAD commit SHAs, whenever a
+    pull moves the store's HEAD.
+
+    Args:
+        listener (HeadChangeListener): the function to call.
+
+    Returns:
+        HeadChangeListener: the same function, unmodified.
+    """
+    _head_change_listeners.append(listener)
+    return listener
+
+
+def changed_paths(store: Store, old: str, new: str, suffix: str = '.gpg') -> Set[str]:
+    """
+    List the files that differ between two commits of a password store. A renamed file is listed under both its old
+    and new names.
+
+    Args:
+        store (Store): the password store.
+        old (str): a commit SHA.
+        new (str): another commit SHA.
+        suffix (str): only list files whose names end with this suffix. (default: '.gpg')
+
+    Returns:
+        Set[str]: paths of the changed files, relative to the root of the repository.
+    """
+    with Repo(store.directory) as repo:
+        diff = repo.git.diff('--name-only', '--no-renames', '-z', old, new)
+
+    return {path for path in diff.split('\0') if path and path.endswith(suffix)}
+
+
+def clone(store: Store, sparse_paths: Iterable[str] | None = None) -> None:
     """
-    Run git clone with configuration from environment variables using gitpython.
+    Clone a password store's repository using gitpython.
+
+    If sparse_paths is given, the clone is shallow (depth 1), blobs are only fetched when they're checked out, and only
+    the directories containing those paths are checked out, alongside every file in their parents (including each
+    .gpg-id along the way).
+
+    If PASS_GIT_BARE is 'true', nothing is checked out at all, as the store is read from git's object database (see
+    passoperator.store). Combined with sparse_paths, the bare clone is shallow too, and blobs are fetched on demand
+    the first time they're read.
+
+    Args:
+        store (Store): the password store.
+        sparse_paths (Iterable[str] | None): pass store paths to check out, relative to the root of the store.
+            (default: None)
     """
-    repo = Repo.clone_from(
-        url=env['PASS_GIT_URL'],
-        to_path=env['PASS_DIRECTORY']
+    start = perf_counter()
+
+    if env['PASS_GIT_BARE'] == 'true':
+        repo = Repo.clone_from(
+            url=store.url,
+            to_path=store.directory,
+            branch=store.branch,
+            single_branch=True,
+            bare=True,
+            **({'depth': 1, 'filter': 'blob:none'} if sparse_paths is not None else {})
+        )
+    elif sparse_paths is None:
+        repo = Repo.clone_from(
+            url=store.url,
+            to_path=store.directory
+        )
+
+        # if store.branch not in repo.branches:
+        #     log.error(f'Branch "{store.branch}" not found in project at URL "{store.url}"')
+        #     sys.exit(1)
+
+        if str(repo.active_branch) != store.branch:
+            repo.git.checkout('origin/' + store.branch)
+    else:
+        repo = Repo.clone_from(
+            url=store.url,
+            to_path=store.directory,
+            branch=store.branch,
+            depth=1,
+            single_branch=True,
+            sparse=True,
+            filter='blob:none'
+        )
+
+        with store.sparse_lock:
+            store.sparse_dirs = {_sparse_dir(path) for path in sparse_paths} - {''}
+            repo.git.sparse_checkout('set', '--cone', *sorted(store.sparse_dirs))
+
+    store.snapshots.publish(repo.head.commit.hexsha, directory=store.directory)
+    store.head = repo.head.commit.hexsha
+    store.scheduler.succeeded(perf_counter() - start)
+
+    log.info(
+        f'Successfully cloned repo {store.url} to password store "{store.name}" at {store.directory} in {perf_counter() - start:.2f}s, '
+        f'using {_disk_usage(Path(store.directory)) / 1024 ** 2:.1f}MiB on disk'
+        + (f' with {len(store.sparse_dirs)} directories checked out' if store.sparse_dirs is not None else '')
     )
 
-    # if env['PASS_GIT_BRANCH'] not in repo.branches:
-    #     log.error(f'Branch "{env["PASS_GIT_BRANCH"]}" not found in project at URL "{env["PASS_GIT_URL"]}"')
-    #     sys.exit(1)
+    repo.close()
+
+
+def sparse_checkout_add(store: Store, paths: Iterable[str]) -> None:
+    """
+    Extend a sparse checkout of a password store to include the directories containing some paths. This is a no-op
+    if the store was cloned in full, or every directory is already checked out.
+
+    Args:
+        store (Store): the password store.
+        paths (Iterable[str]): pass store paths, relative to the root of the store.
+    """
+    if store.sparse_dirs is None:
+        return None
 
-    if str(repo.active_branch) != env['PASS_GIT_BRANCH']:
-        repo.git.checkout('origin/' + env['PASS_GIT_BRANCH'])
+    with store.sparse_lock:
+        dirs = {_sparse_dir(path) for path in paths} - {''}
 
-    log.info(f'Successfully cloned repo {env["PASS_GIT_URL"]} to password store {env["PASS_DIRECTORY"]}')
+        # Cone mode checks out directories recursively, so anything beneath a checked-out directory is already there.
+        missing = {
+            path for path in dirs
+            if not any(path == known or path.startswith(f'{known}/') for known in store.sparse_dirs)
+        }
 
+        if not missing:
+            return None
 
-def pull(daemon: bool =False, retry: bool =False) -> None:
+        with Repo(store.directory) as repo:
+            repo.git.sparse_checkout('add', *sorted(missing))
+
+        store.sparse_dirs.update(missing)
+
+    log.info(f'Added {len(missing)} directories to the sparse checkout of password store "{store.name}": {", ".join(sorted(missing))}')
+
+    return None
+
+
+def _sparse_dir(path: str) -> str:
+    """
+    Get the directory of a pass store path to check out.
+
+    Args:
+        path (str): pass store path, relative to PASS_DIRECTORY.
+
+    Returns:
+        str: the path's directory, or '' for paths at the root of the store.
     """
-    Blocking function that optionally runs 'git pull' in the cloned repository, repeatedly. This said, the
-    default behavior is to retry indefinitely until a 'git pull' succeeds.
+    parent = PurePosixPath(path.strip('/')).parent.as_posix()
+
+    return '' if parent == '.' else parent
+
+
+def _disk_usage(path: Path) -> int:
+    """
+    Measure the disk space used by a directory tree.
 
     Args:
-        daemon (bool): whether or not to loop on the user-specified OPERATOR_INTERVAL. (default: False)
-        retry (bool): whether or not to retry the git pull indefinitely until it succeeds. (default: False)
+        path (Path): root of the tree.
+
+    Returns:
+        int: bytes allocated to the files in the tree.
+    """
+    return sum(
+        (Path(root) / name).lstat().st_blocks * 512
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+async def _git(store: Store, *args: str) -> str:
     """
-    tries = 0
+    Run a git command in a store's repository as a subprocess on the event loop. If the calling task is cancelled,
+    the subprocess is killed before the cancellation propagates.
 
+    Args:
+        store (Store): the password store.
+        args (str): arguments to git.
+
+    Returns:
+        str: the command's stdout, stripped.
+
+    Raises:
+        GitCommandError: if git exits with a non-zero status.
+    """
+    process = await asyncio.create_subprocess_exec(
+        'git', *args,
+        cwd=store.directory,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+        raise
+
+    if process.returncode:
+        raise GitCommandError(['git', *args], process.returncode, stderr.decode('utf-8', errors='replace'))
+
+    return stdout.decode('utf-8').strip()
+
+
+async def remote_head(store: Store) -> str | None:
+    """
+    Probe a store's remote for the commit SHA of its branch, without fetching any objects.
+
+    Args:
+        store (Store): the password store.
+
+    Returns:
+        str | None: the commit SHA, or None if the remote doesn't have the branch.
+    """
+    refs = await _git(store, 'ls-remote', 'origin', f'refs/heads/{store.branch}')
+
+    return refs.split()[0] if refs else None
+
+
+async def fast_forward(store: Store) -> None:
+    """
+    Fetch a store's branch and fast-forward the checked-out store to it. The store is a read-only mirror of the
+    remote, so if the branch was rewritten upstream and can't be fast-forwarded, the store is reset to match it. A bare
+    store has nothing checked out, so its branch is just moved to the remote's.
+
+    Args:
+        store (Store): the password store.
+    """
+    if await _git(store, 'rev-parse', '--is-bare-repository') == 'true':
+        await _git(store, 'fetch', 'origin', f'+refs/heads/{store.branch}:refs/heads/{store.branch}')
+        return None
+
+    await _git(store, 'fetch', 'origin', f'refs/heads/{store.branch}')
+
+    try:
+        await _git(store, 'merge', '--ff-only', 'FETCH_HEAD')
+    except GitCommandError as e:
+        log.warning(f'Could not fast-forward the password store to origin/{store.branch}, resetting to it instead: {e}')
+        await _git(store, 'reset', '--hard', 'FETCH_HEAD')
+
+    return None
+
+
+def request_pull(store: Store) -> None:
+    """
+    Ask a store's pull loop to check the remote for changes now, rather than once its interval is up. Requests that
+    arrive within PASS_WEBHOOK_DEBOUNCE seconds of one another are coalesced into a single pull. Must be called on the
+    event loop the pull loop runs on.
+
+    Args:
+        store (Store): the password store.
+    """
+    store.pull_requested.set()
+
+
+async def wait_for_pull(store: Store) -> str:
+    """
+    Wait for a store's pull loop to complete its next pull, whether or not the pull moved HEAD. Pulls that fail don't
+    complete; their retries do.
+
+    Args:
+        store (Store): the password store.
+
+    Returns:
+        str: the store's HEAD commit SHA after the pull.
+    """
+    await store.pulled.wait()
+
+    return store.head
+
+
+def _pull_completed(store: Store, head: str) -> None:
+    """
+    Record a store's HEAD after a pull, and wake everything waiting on the pull. Later waiters wait on the pull after.
+
+    Args:
+        store (Store): the password store.
+        head (str): HEAD commit SHA after the pull.
+    """
+    store.head = head
+    pulled, store.pulled = store.pulled, asyncio.Event()
+    pulled.set()
+
+
+async def _wait_for_next_pull(store: Store, delay: float) -> None:
+    """
+    Wait until a store's next pull is due. While pulls are succeeding, a requested pull cuts the wait short once
+    requests have settled; while they're failing, the backoff is always waited out, so that pushes can't hammer a
+    remote that's struggling.
+
+    Args:
+        store (Store): the password store.
+        delay (float): seconds until the next pull is due.
+    """
+    if store.scheduler.failures:
+        await asyncio.sleep(delay)
+        return None
+
+    try:
+        await asyncio.wait_for(store.pull_requested.wait(), timeout=delay)
+    except asyncio.TimeoutError:
+        return None
+
+    await asyncio.sleep(float(env['PASS_WEBHOOK_DEBOUNCE']))
+    store.pull_requested.clear()
+
+    return None
+
+
+async def pull(store: Store, daemon: bool =False, retry: bool =False) -> None:
+    """
+    Update a store's cloned repository from its remote, optionally repeatedly, on the running event loop. This said,
+    the default behavior is to retry indefinitely until an update succeeds. Cancelling the task running the pull loop
+    stops it, killing any git command in flight.
+
+    Each update first asks the remote for the SHA of the store's branch, which is cheap for both us and the git
+    server, and only fetches and fast-forwards if it differs from our HEAD. Failed updates, for whatever reason, are
+    retried with exponential backoff (see PullScheduler). Publishing a snapshot and notifying listeners of a moved HEAD
+    block, so they're run in a thread; a listener that fails is logged, and doesn't fail the pull.
+
+    Args:
+        store (Store): the password store.
+        daemon (bool): whether or not to loop on the user-specified PASS_GIT_PULL_INTERVAL, or whenever a pull is
+            requested. (default: False)
+        retry (bool): whether or not to retry the update indefinitely until it succeeds. (default: False)
+    """
     while daemon or retry:
-        # Try to pull from the repository. If successful and daemon is not set, break from the loop.
-        # Otherwise, continue to try to pull from the repository on an interval.
+        start = perf_counter()
+
         try:
-            log.info(f'Updating local password store at "{env["PASS_DIRECTORY"]}"')
-            repo = Repo(env['PASS_DIRECTORY'])
-            repo.remotes.origin.pull()
-            if daemon:
-                tries = 0
-                sleep(float(env['OPERATOR_INTERVAL']))
-        except CommandError as e:
-            log.error(f'Retry {tries} git pull: {e}')
-            tries += 1
-
-        if not daemon:
-            break
\ No newline at end of file
+            before = await _git(store, 'rev-parse', 'HEAD')
+            remote = await remote_head(store)
+
+            if remote is None:
+                raise GitCommandError('ls-remote', f'Branch "{store.branch}" not found on remote "origin"')
+
+            after = before
+
+            if remote != before:
+                log.info(f'Updating password store "{store.name}" at "{store.directory}" to {remote}')
+                await fast_forward(store)
+                after = await _git(store, 'rev-parse', 'HEAD')
+            else:
+                log.debug(f'Password store "{store.name}" is up-to-date with origin/{store.branch} at {before}')
+
+            # Compare against the published commit rather than the one before this pull, so a HEAD that moved on a
+            # pull that failed to publish it is published on the next one.
+            published = store.snapshots.commit or before
+
+            if after != published:
+                log.info(f'Password store "{store.name}" HEAD moved from {published} to {after}')
+
+                # Readers move onto the new commit with their next snapshot, while those in flight finish on theirs.
+                await asyncio.to_thread(store.snapshots.publish, after, store.directory)
+
+                for listener in _head_change_listeners:
+                    try:
+                        await asyncio.to_thread(listener, store, published, after)
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        log.exception(f'Head change listener {getattr(listener, "__name__", listener)} failed on store "{store.name}": {e}')
+
+            store.scheduler.succeeded(perf_counter() - start)
+            _pull_completed(store, after)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Anything else failing (e.g., git can't be spawned, or publishing fails) is retried like a failed git
+            # command, as an exception would end the store's pull loop for good.
+            store.scheduler.failed(perf_counter() - start)
+            log.error(
+                f'Git pull of password store "{store.name}" failed {store.scheduler.failures} time(s) in a row, '
+                f'retrying in up to {store.scheduler.backoff():.1f}s: {e}',
+                exc_info=not isinstance(e, CommandError)
+            )
+
+        if not daemon and not store.scheduler.failures:
+            break
+
+        await _wait_for_next_pull(store, store.scheduler.delay())
@@ -3,39 +3,365 @@ Provide methods for interacting with GnuPG.
 """
 
 
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple
 from pathlib import Path
+from contextlib import contextmanager
+from threading import Condition, Lock
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from queue import SimpleQueue
+from tempfile import mkdtemp
+from subprocess import Popen, PIPE, DEVNULL
+from io import BytesIO
+from contextlib import ExitStack
 from gnupg import GPG
 
+from passoperator.cache import session_keys
+from passoperator.store import Snapshot
+from passoperator import env
+
+import asyncio
 import logging
+import os
+import shutil
+import base64
+import multiprocessing
+
+try:
+    import pgpy
+except ImportError:
+    pgpy = None
 
 
 log = logging.getLogger(__name__)
 
 
-def decrypt(path: Path, home: Path = Path('~/.gnupg').expanduser(), passphrase: str | None = None) -> str | None:
+class GPGPool:
+    """
+    A thread-safe, bounded pool of ready GPG contexts, keyed by GnuPG home directory.
+
+    Instantiating a GPG object runs gpg as a subprocess to discover its version, so we only want to pay that
+    cost once per context rather than once per decrypted secret.
+    """
+    def __init__(self, maxsize: int = 4) -> None:
+        self.maxsize = maxsize
+        self.created = 0
+        self.reused = 0
+
+        self._condition = Condition()
+        self._idle: Dict[str, List[GPG]] = {}
+        self._size: Dict[str, int] = {}
+
+    @contextmanager
+    def context(self, home: Path) -> Iterator[GPG]:
+        """
+        Check out a GPG context for a GnuPG home directory, returning it to the pool on exit. Blocks if the pool
+        for this home directory is at capacity and every context is checked out.
+
+        Args:
+            home (Path): GnuPG home directory.
+
+        Yields:
+            GPG: a GPG context that is exclusive to the caller until the context manager exits.
+        """
+        gpg = self._acquire(home)
+
+        try:
+            yield gpg
+        finally:
+            self._release(home, gpg)
+
+    def _acquire(self, home: Path) -> GPG:
+        """
+        Retrieve an idle GPG context from the pool, or create one if the pool isn't yet at capacity.
+
+        Args:
+            home (Path): GnuPG home directory.
+
+        Returns:
+            GPG: a GPG context.
+        """
+        key = str(home)
+
+        with self._condition:
+            while True:
+                if self._idle.get(key):
+                    self.reused += 1
+                    return self._idle[key].pop()
+
+                if self._size.get(key, 0) < self.maxsize:
+                    self._size[key] = self._size.get(key, 0) + 1
+                    break
+
+                self._condition.wait()
+
+        # Construct the context outside of the lock, since this spawns a gpg subprocess.
+        try:
+            home.mkdir(parents=True, exist_ok=True)
+            gpg = GPG(gnupghome=key)
+        except Exception:
+            with self._condition:
+                self._size[key] -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self.created += 1
+
+        log.debug(f'Created GPG context {self._size[key]}/{self.maxsize} for GnuPG home "{key}"')
+
+        return gpg
+
+    def _release(self, home: Path, gpg: GPG) -> None:
+        """
+        Return a GPG context to the pool.
+
+        Args:
+            home (Path): GnuPG home directory.
+            gpg (GPG): the GPG context to return.
+        """
+        with self._condition:
+            self._idle.setdefault(str(home), []).append(gpg)
+            self._condition.notify()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report how many times contexts were created versus reused.
+
+        Returns:
+            Dict[str, int]: pool statistics.
+        """
+        with self._condition:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'idle': sum(len(contexts) for contexts in self._idle.values()),
+                'maxsize': self.maxsize
+            }
+
+
+pool = GPGPool(maxsize=int(env['PASS_GPG_POOL_SIZE']))
+
+
+class Decrypted(NamedTuple):
+    """
+    A decrypted pass store path. The value and session key are redacted from this object's representation, so
+    results may be logged or passed between processes without leaking plaintext.
+    """
+    path: Path
+    value: str | None
+    session_key: str | None = None
+
+    def __repr__(self) -> str:
+        return f'Decrypted(path={self.path!r}, value={None if self.value is None else "<redacted>"})'
+
+
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_lock = Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool that's shared by every handler, starting it on first use. Worker processes are spawned
+    rather than forked, since forking a process with running threads may copy locks in a held state.
+
+    Returns:
+        ProcessPoolExecutor: the shared process pool.
+    """
+    global _process_pool
+
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=int(env['PASS_DECRYPT_THREADS']),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            log.info(f'Started decryption process pool with {env["PASS_DECRYPT_THREADS"]} workers')
+
+        return _process_pool
+
+
+def _reset_process_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Drop a process pool that's broken (a worker died, e.g. it was OOM-killed), so the next job starts a new one
+    instead of every later job failing until the operator restarts.
+
+    Args:
+        pool (ProcessPoolExecutor): the broken pool.
+    """
+    global _process_pool
+
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+            log.warning('Decryption process pool is broken, it will be restarted with the next job')
+
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class InProcessKey:
+    """
+    A private key that's loaded and unlocked once, so pass store entries can be decrypted in this process with PGPy,
+    rather than by starting gpg.
+    """
+    def __init__(self, key: str, passphrase: str | None = None) -> None:
+        """
+        Args:
+            key (str): the private key, ASCII-armored or b64enc'ed ASCII-armored (as PASS_GPG_KEY is provided).
+            passphrase (str | None): passphrase of the private key, if it has one.
+
+        Raises:
+            ValueError: if the key couldn't be parsed, or isn't a private key.
+        """
+        try:
+            self.key, _ = pgpy.PGPKey.from_blob(key)
+        except (ValueError, pgpy.errors.PGPError):
+            self.key, _ = pgpy.PGPKey.from_blob(base64.b64decode(key))
+
+        if self.key.is_public:
+            raise ValueError(f'Key {self.key.fingerprint} is not a private key')
+
+        # Keep the key unlocked until close(), so we only pay for the passphrase's key derivation once.
+        self._unlocked = ExitStack()
+
+        if self.key.is_protected:
+            self._unlocked.enter_context(self.key.unlock(passphrase or ''))
+
+    def decrypt(self, path: Path, store: Snapshot | None = None) -> str | None:
+        """
+        Decrypt a path in the store.
+
+        Args:
+            path (Path): pass store path.
+            store (Snapshot | None): snapshot of the store to read the path from, rather than the working tree.
+
+        Returns:
+            str | None: b64enc'ed, decrypted bytes if we could decrypt it; None, otherwise.
+        """
+        try:
+            if store is not None:
+                encrypted = pgpy.PGPMessage.from_blob(store.read(path))
+            else:
+                encrypted = pgpy.PGPMessage.from_file(f'{path}.gpg')
+
+            message = self.key.decrypt(encrypted).message
+        except (OSError, ValueError, NotImplementedError, pgpy.errors.PGPError) as e:
+            log.debug(f'Could not decrypt "{path}.gpg" in-process: {e}')
+            return None
+
+        return _b64encode_plaintext(message.encode('utf-8') if isinstance(message, str) else bytes(message))
+
+    def close(self) -> None:
+        """
+        Lock the key, clearing its unprotected key material.
+        """
+        self._unlocked.close()
+
+
+# Keys for the 'pgpy' backend, keyed by the GnuPG home directory of the store they decrypt.
+_in_process_keys: Dict[str, InProcessKey] = {}
+_in_process_key_lock = Lock()
+
+
+def load_private_key(key: str | None = None, passphrase: str | None = None,
+                     home: Path = Path('~/.gnupg').expanduser()) -> bool:
+    """
+    Load and unlock the private key for the 'pgpy' decryption backend, replacing any key that's already loaded for
+    the same GnuPG home directory.
+
+    Args:
+        key (str | None): the private key, ASCII-armored or b64enc'ed ASCII-armored. (default: PASS_GPG_KEY)
+        passphrase (str | None): passphrase of the private key, if it has one. (default: PASS_GPG_PASSPHRASE)
+        home (Path): GnuPG home directory of the store the key decrypts. (default: ~/.gnupg)
+
+    Returns:
+        bool: True if the key is ready for in-process decryption; False if we'll have to fall back to gpg.
+    """
+    with _in_process_key_lock:
+        previous = _in_process_keys.pop(str(home), None)
+
+        if previous is not None:
+            previous.close()
+
+        if pgpy is None:
+            log.warning('PASS_DECRYPT_BACKEND is "pgpy", but PGPy is not installed. Falling back to gpg')
+            return False
+
+        try:
+            loaded = InProcessKey(
+                env['PASS_GPG_KEY'] if key is None else key,
+                env['PASS_GPG_PASSPHRASE'] if passphrase is None else passphrase
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.warning(f'Could not load the private key for in-process decryption, falling back to gpg: {e}')
+            return False
+
+        _in_process_keys[str(home)] = loaded
+
+        log.info(f'Loaded private key {loaded.key.fingerprint} for in-process decryption of GnuPG home "{home}"')
+
+        return True
+
+
+def _decrypt_in_process(paths: List[Path], store: Snapshot | None = None,
+                        home: Path = Path('~/.gnupg').expanduser()) -> Tuple[List[Decrypted], List[Path]]:
+    """
+    Decrypt what we can of a list of paths in the store in-process, if the 'pgpy' backend is configured.
+
+    Args:
+        paths (List[Path]): pass store paths.
+        store (Snapshot | None): snapshot of the store to read the paths from, rather than the working tree.
+        home (Path): GnuPG home directory whose key decrypts the paths. (default: ~/.gnupg)
+
+    Returns:
+        Tuple[List[Decrypted], List[Path]]: the paths we decrypted, and the paths that gpg should try.
+    """
+    key = _in_process_keys.get(str(home))
+
+    if env['PASS_DECRYPT_BACKEND'] != 'pgpy' or key is None:
+        return [], paths
+
+    decrypted: List[Decrypted] = []
+    remaining: List[Path] = []
+
+    for path in paths:
+        value = key.decrypt(path, store)
+
+        if value is not None:
+            decrypted.append(Decrypted(path, value))
+        else:
+            remaining.append(path)
+
+    return decrypted, remaining
+
+
+def decrypt(path: Path, home: Path = Path('~/.gnupg').expanduser(), passphrase: str | None = None,
+            store: Snapshot | None = None) -> str | None:
     """
     Decrypt a path in the store to a string.
 
     Args:
         path (Path): pass store path.
         home (Path): GnuPG home directory (default: ~/.gnupg)
+        store (Snapshot | None): snapshot of the store to read the path from, rather than the working tree.
 
     Returns:
         Optional[str]: the decrypted string if we could decrypt it; None, otherwise.
     """
-    home.mkdir(parents=True, exist_ok=True)
+    try:
+        encrypted = BytesIO(store.read(path)) if store is not None else f'{path}.gpg'
 
-    gpg = GPG(
-        gnupghome=home
-    )
+        with pool.context(home) as gpg:
+            # https://gnupg.readthedocs.io/en/latest/#decryption
+            decrypted_file = gpg.decrypt_file(
+                encrypted,
+                always_trust=True,
+                passphrase=passphrase
+            )
 
-    try:
-        # https://gnupg.readthedocs.io/en/latest/#decryption
-        decrypted_file = gpg.decrypt_file(
-            f'{path}.gpg',
-            always_trust=True,
-            passphrase=passphrase
-        )
+        if not decrypted_file.ok:
+            log.error(f'Failed to decrypt "{path}.gpg": {decrypted_file.status}')
+            return None
 
         return str(decrypted_file).rstrip()
     except (IOError, PermissionError) as e:
@@ -43,14 +369,565 @@ def decrypt(path: Path, home: Path = Path('~/.gnupg').expanduser(), passphrase:
         return None
 
 
-def decrypt_bytes(path: Path) -> str:
+def decrypt_batch(paths: Iterable[Path], home: Path = Path('~/.gnupg').expanduser(), passphrase: str | None = None,
+                  workers: int = 1, blobs: Dict[Path, str] | None = None, store: Snapshot | None = None) -> Iterator[Decrypted]:
+    """
+    Decrypt many paths in the store with at most 'workers' gpg processes, rather than one process per path. Each
+    process is handed a share of the paths through 'gpg --decrypt-files', and results are yielded as soon as they're
+    available, in no particular order. Values are base64-encoded, as with decrypt_bytes.
+
+    gpg processes are driven from threads in this process, or from the shared pool of worker processes if
+    PASS_DECRYPT_BACKEND is 'process'. The latter moves parsing and encoding work out from under this process' GIL.
+    If PASS_DECRYPT_BACKEND is 'pgpy', paths are decrypted in this process with the key from load_private_key, and
+    gpg is only started for paths that PGPy can't decrypt.
+
+    If the session key cache is enabled and the paths' blob IDs are provided, the session key of every file we
+    decrypt is cached. Files we've seen before are then decrypted with their session key, which skips the private key
+    operation, at the cost of one gpg process per file.
+
+    Args:
+        paths (Iterable[Path]): pass store paths.
+        home (Path): GnuPG home directory (default: ~/.gnupg)
+        passphrase (str | None): passphrase of the private key, if it has one.
+        workers (int): maximum number of concurrent gpg processes. (default: 1)
+        blobs (Dict[Path, str] | None): blob IDs of the paths' .gpg files, to key cached session keys by.
+        store (Snapshot | None): snapshot of the store to read the paths from, rather than the working tree.
+
+    Yields:
+        Decrypted: each path with its b64enc'ed, decrypted bytes if we could decrypt it; None, otherwise.
+    """
+    decrypted, paths = _decrypt_in_process(list(dict.fromkeys(paths)), store, home)
+    blobs = blobs if blobs is not None and session_keys.maxbytes > 0 else {}
+
+    yield from decrypted
+
+    if not paths:
+        return None
+
+    jobs, unkeyed = _plan_decrypt_jobs(paths, blobs)
+    keyed = {path for (path,), _ in jobs}
+
+    batches = max(1, min(workers, len(unkeyed)))
+    jobs += [(unkeyed[batch::batches], None) for batch in range(batches) if unkeyed[batch::batches]]
+
+    retry: List[Path] = []
+
+    for result in _run_decrypt_jobs(jobs, home, passphrase, max(1, min(workers, len(jobs))), show_session_key=bool(blobs), store=store):
+        if _needs_retry(result, keyed, blobs):
+            retry.append(result.path)
+        else:
+            yield result._replace(session_key=None)
+
+    if retry:
+        yield from _run_decrypt_jobs([(retry, None)], home, passphrase, 1, store=store)
+
+    return None
+
+
+def _plan_decrypt_jobs(paths: List[Path], blobs: Dict[Path, str]) -> Tuple[List[Tuple[List[Path], str | None]], List[Path]]:
+    """
+    Split paths into those we hold a cached session key for, which are decrypted one per gpg process, and those
+    that need the private key, which may be batched.
+
+    Args:
+        paths (List[Path]): pass store paths.
+        blobs (Dict[Path, str]): blob IDs of the paths' .gpg files.
+
+    Returns:
+        Tuple[List[Tuple[List[Path], str | None]], List[Path]]: a decryption job per session-keyed path, and the
+            remaining paths.
+    """
+    jobs: List[Tuple[List[Path], str | None]] = []
+    unkeyed: List[Path] = []
+
+    for path in paths:
+        sessionKey = session_keys.get(blobs[path]) if path in blobs else None
+
+        if sessionKey is not None:
+            jobs.append(([path], sessionKey))
+        else:
+            unkeyed.append(path)
+
+    return jobs, unkeyed
+
+
+def _needs_retry(decrypted: Decrypted, keyed: Set[Path], blobs: Dict[Path, str]) -> bool:
     """
-    Decrypt a path in the store to a b64enc'ed string of bytes.
+    Update the session key cache with a decryption result.
+
+    Args:
+        decrypted (Decrypted): result of decrypting a path.
+        keyed (Set[Path]): paths that were decrypted with a cached session key.
+        blobs (Dict[Path, str]): blob IDs of the paths' .gpg files.
+
+    Returns:
+        bool: True if a cached session key didn't work out, and the path should be retried with the private key.
+    """
+    if decrypted.value is None and decrypted.path in keyed:
+        session_keys.discard(blobs[decrypted.path])
+        return True
+
+    if decrypted.session_key is not None and decrypted.path in blobs:
+        session_keys.put(blobs[decrypted.path], decrypted.session_key)
+
+    return False
+
+
+def _run_decrypt_jobs(jobs: List[Tuple[List[Path], str | None]], home: Path, passphrase: str | None, workers: int,
+                      show_session_key: bool = False, store: Snapshot | None = None) -> Iterator[Decrypted]:
+    """
+    Run decryption jobs (lists of paths to decrypt with one gpg process, and optionally their session key) on the
+    configured backend, with at most 'workers' of them at a time.
+
+    Args:
+        jobs (List[Tuple[List[Path], str | None]]): lists of pass store paths, with a session key to decrypt them with.
+        home (Path): GnuPG home directory.
+        passphrase (str | None): passphrase of the private key, if it has one.
+        workers (int): maximum number of concurrent gpg processes.
+        show_session_key (bool): whether or not to capture the session key of every file. (default: False)
+        store (Snapshot | None): snapshot of the store to read the paths from, rather than the working tree.
+
+    Yields:
+        Decrypted: each path's result, as soon as it's available.
+    """
+    if env['PASS_DECRYPT_BACKEND'] == 'process':
+        futures: Dict[Future, Tuple[List[Path], ProcessPoolExecutor]] = {}
+
+        for paths, sessionKey in jobs:
+            # A pool that broke since it was last used is replaced once, before giving up on the job.
+            for attempt in range(2):
+                pool = _get_process_pool()
+
+                try:
+                    futures[pool.submit(_decrypt_files_to_list, paths, home, passphrase, sessionKey, show_session_key, store)] = (paths, pool)
+                    break
+                except BrokenProcessPool as e:
+                    _reset_process_pool(pool)
+
+                    if attempt:
+                        log.error(f'Decryption worker process failed: {e}')
+                        yield from (Decrypted(path, None) for path in paths)
+
+        for future in as_completed(futures):
+            try:
+                yield from future.result()
+            except BrokenProcessPool as e:
+                log.error(f'Decryption worker process failed: {e}')
+                _reset_process_pool(futures[future][1])
+                yield from (Decrypted(path, None) for path in futures[future][0])
+
+        return None
+
+    results: SimpleQueue[Decrypted] = SimpleQueue()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gpg-batch') as executor:
+        for paths, sessionKey in jobs:
+            executor.submit(_decrypt_files, paths, home, passphrase, results, sessionKey, show_session_key, store)
+
+        for _ in range(sum(len(paths) for paths, _ in jobs)):
+            yield results.get()
+
+    return None
+
+
+def _decrypt_files_to_list(paths: List[Path], home: Path, passphrase: str | None, session_key: str | None = None,
+                           show_session_key: bool = False, store: Snapshot | None = None) -> List[Decrypted]:
+    """
+    Decrypt a list of paths in the store with a single gpg process, collecting the results. This is the entrypoint
+    for decryption in worker processes.
+
+    Args:
+        paths (List[Path]): pass store paths.
+        home (Path): GnuPG home directory.
+        passphrase (str | None): passphrase of the private key, if it has one.
+        session_key (str | None): session key to decrypt the paths with, instead of the private key.
+        show_session_key (bool): whether or not to capture the session key of every file. (default: False)
+        store (Snapshot | None): snapshot of the store to read the paths from, rather than the working tree.
+
+    Returns:
+        List[Decrypted]: each path with its b64enc'ed, decrypted bytes if we could decrypt it; None, otherwise.
+    """
+    results: SimpleQueue[Decrypted] = SimpleQueue()
+    _decrypt_files(paths, home, passphrase, results, session_key, show_session_key, store)
+
+    return [results.get() for _ in paths]
+
+
+def _decrypt_files(paths: List[Path], home: Path, passphrase: str | None, results: SimpleQueue,
+                   session_key: str | None = None, show_session_key: bool = False, store: Snapshot | None = None) -> None:
+    """
+    Decrypt a list of paths in the store with a single gpg process, putting each result on a queue as it completes.
+
+    Plaintext is written by gpg to a private temporary directory (in memory, if /dev/shm is available) and removed as
+    soon as it's read back.
+
+    Args:
+        paths (List[Path]): pass store paths.
+        home (Path): GnuPG home directory.
+        passphrase (str | None): passphrase of the private key, if it has one.
+        results (SimpleQueue): queue to put each Decrypted result on.
+        session_key (str | None): session key to decrypt the paths with, instead of the private key.
+        show_session_key (bool): whether or not to capture the session key of every file. (default: False)
+        store (Snapshot | None): snapshot of the store to read the paths from, rather than the working tree.
+    """
+    try:
+        status = _DecryptFilesStatus(paths, store)
+    except OSError as e:
+        log.error(e)
+
+        for path in paths:
+            results.put(Decrypted(path, None))
+
+        return None
+
+    args, fds = status.args(session_key, show_session_key)
+    passphrase = None if session_key is not None else passphrase
+
+    try:
+        with pool.context(home) as gpg:
+            with Popen(
+                gpg.make_args(args, passphrase=bool(passphrase)),
+                stdin=PIPE if passphrase else DEVNULL,
+                stdout=DEVNULL,
+                stderr=PIPE,
+                pass_fds=fds
+            ) as process:
+                if passphrase and process.stdin:
+                    process.stdin.write(f'{passphrase}\n'.encode(gpg.encoding))
+                    process.stdin.close()
+
+                assert process.stderr is not None
+
+                # python-gnupg directs gpg's status messages to stderr.
+                for line in process.stderr:
+                    decrypted = status.feed(line.decode(gpg.encoding, 'replace'))
+
+                    if decrypted is not None:
+                        results.put(decrypted)
+    except OSError as e:
+        log.error(e)
+    finally:
+        for decrypted in status.close():
+            results.put(decrypted)
+
+
+class _DecryptFilesStatus:
+    """
+    Track a single 'gpg --decrypt-files' run over some pass store paths, from linking the paths into a private
+    temporary directory, through following gpg's status messages, to cleaning up.
+
+    gpg writes each file's plaintext next to its input with the .gpg suffix removed, so it's pointed at links to the
+    store that live in the temporary directory (in memory, if /dev/shm is available). When reading from a snapshot of
+    the store, the ciphertext is copied out of git's object database into the temporary directory instead. Plaintext
+    is removed as soon as it's read back.
+    """
+    def __init__(self, paths: List[Path], store: Snapshot | None = None) -> None:
+        self.workdir = Path(mkdtemp(prefix='passoperator-', dir='/dev/shm' if os.path.isdir('/dev/shm') else None))
+        self.pending: Dict[str, Path] = {}
+        self.fds: Tuple[int, ...] = ()
+
+        self._current: str | None = None
+        self._sessionKey: str | None = None
+        self._decrypted = False
+
+        try:
+            for n, path in enumerate(paths):
+                link = self.workdir / f'{n}.gpg'
+
+                if store is None:
+                    link.symlink_to(Path(f'{path}.gpg').absolute())
+                else:
+                    try:
+                        link.write_bytes(store.read(path))
+                    except FileNotFoundError as e:
+                        # Leave the link out, and gpg will report the path as failed like any other missing file.
+                        log.error(e)
+
+                self.pending[str(link)] = path
+        except OSError:
+            self.close()
+            raise
+
+    def args(self, session_key: str | None = None, show_session_key: bool = False) -> Tuple[List[str], Tuple[int, ...]]:
+        """
+        Build the gpg arguments for this run.
+
+        Args:
+            session_key (str | None): session key to decrypt the paths with, instead of the private key.
+            show_session_key (bool): whether or not to capture the session key of every file. (default: False)
+
+        Returns:
+            Tuple[List[str], Tuple[int, ...]]: gpg arguments, and file descriptors gpg needs to inherit.
+        """
+        args = ['--yes']
+
+        if session_key is not None:
+            # Hand the session key over a pipe, rather than as an argument that's visible to other processes.
+            readfd, writefd = os.pipe()
+            os.write(writefd, f'{session_key}\n'.encode('ascii'))
+            os.close(writefd)
+            self.fds = (readfd,)
+            args += ['--override-session-key-fd', str(readfd)]
+        elif show_session_key:
+            args.append('--show-session-key')
+
+        return [*args, '--decrypt-files', *self.pending], self.fds
+
+    def feed(self, line: str) -> Decrypted | None:
+        """
+        Process a line of gpg's status output.
+
+        Args:
+            line (str): a status line.
+
+        Returns:
+            Decrypted | None: the result for a path, if gpg just finished with it.
+        """
+        status = line.rstrip().split(' ')
+
+        if status[0] != '[GNUPG:]' or len(status) < 2:
+            return None
+
+        if status[1] == 'FILE_START':
+            self._current, self._sessionKey, self._decrypted = ' '.join(status[3:]), None, False
+        elif status[1] == 'SESSION_KEY' and len(status) > 2:
+            self._sessionKey = status[2]
+        elif status[1] == 'DECRYPTION_OKAY':
+            self._decrypted = True
+        elif status[1] == 'FILE_DONE' and self._current in self.pending:
+            output = Path(self._current).with_suffix('')
+
+            try:
+                decryptedSecret = _b64encode_plaintext(output.read_bytes()) if self._decrypted else None
+            finally:
+                output.unlink(missing_ok=True)
+
+            if decryptedSecret is None:
+                log.error(f'Failed to decrypt "{self.pending[self._current]}.gpg"')
+
+            return Decrypted(self.pending.pop(self._current), decryptedSecret, self._sessionKey if self._decrypted else None)
+
+        return None
+
+    def close(self) -> List[Decrypted]:
+        """
+        Clean up after the run.
+
+        Returns:
+            List[Decrypted]: failed results for the paths gpg didn't report on.
+        """
+        # Anything gpg didn't report on couldn't be decrypted.
+        failed = [Decrypted(path, None) for path in self.pending.values()]
+        self.pending.clear()
+
+        for fd in self.fds:
+            os.close(fd)
+
+        self.fds = ()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+        return failed
+
+
+# Bounds the number of gpg processes started by decrypt_many across every coroutine on the event loop.
+_semaphore = asyncio.Semaphore(int(env['PASS_DECRYPT_THREADS']))
+
+# GPG contexts that are only used to build gpg command lines for decrypt_many, keyed by GnuPG home directory.
+_async_contexts: Dict[str, GPG] = {}
+
+
+async def decrypt_many(paths: Iterable[Path], home: Path = Path('~/.gnupg').expanduser(), passphrase: str | None = None,
+                       blobs: Dict[Path, str] | None = None, store: Snapshot | None = None) -> Dict[Path, str | None]:
+    """
+    Decrypt many paths in the store from the event loop. Paths are split into batches of PASS_DECRYPT_BATCH_SIZE and
+    each batch is handed to a 'gpg --decrypt-files' subprocess, with at most PASS_DECRYPT_THREADS of them running at
+    once across every caller. Values are base64-encoded, as with decrypt_bytes, and session keys are cached as with
+    decrypt_batch. If PASS_DECRYPT_BACKEND is 'pgpy', paths are decrypted in-process on a worker thread first.
+
+    Args:
+        paths (Iterable[Path]): pass store paths.
+        home (Path): GnuPG home directory (default: ~/.gnupg)
+        passphrase (str | None): passphrase of the private key, if it has one.
+        blobs (Dict[Path, str] | None): blob IDs of the paths' .gpg files, to key cached session keys by.
+        store (Snapshot | None): snapshot of the store to read the paths from, rather than the working tree.
+
+    Returns:
+        Dict[Path, str | None]: each path's b64enc'ed, decrypted bytes if we could decrypt it; None, otherwise.
+    """
+    paths = list(dict.fromkeys(paths))
+    blobs = blobs if blobs is not None and session_keys.maxbytes > 0 else {}
+    results: Dict[Path, str | None] = {}
+
+    if env['PASS_DECRYPT_BACKEND'] == 'pgpy' and paths:
+        # PGPy is CPU-bound, so keep it off of the event loop.
+        decrypted, paths = await asyncio.to_thread(_decrypt_in_process, paths, store, home)
+        results.update((result.path, result.value) for result in decrypted)
+
+    if not paths:
+        return results
+
+    if str(home) not in _async_contexts:
+        home.mkdir(parents=True, exist_ok=True)
+        _async_contexts[str(home)] = await asyncio.to_thread(GPG, gnupghome=str(home))
+
+    gpg = _async_contexts[str(home)]
+
+    jobs, unkeyed = _plan_decrypt_jobs(paths, blobs)
+    keyed = {path for (path,), _ in jobs}
+
+    size = max(1, int(env['PASS_DECRYPT_BATCH_SIZE']))
+    jobs += [(unkeyed[n:n + size], None) for n in range(0, len(unkeyed), size)]
+
+    retry: List[Path] = []
+
+    for batch in await asyncio.gather(*(_decrypt_files_async(gpg, batch, passphrase, sessionKey, bool(blobs), store) for batch, sessionKey in jobs)):
+        for decrypted in batch:
+            if _needs_retry(decrypted, keyed, blobs):
+                retry.append(decrypted.path)
+            else:
+                results[decrypted.path] = decrypted.value
+
+    if retry:
+        results.update((decrypted.path, decrypted.value) for decrypted in await _decrypt_files_async(gpg, retry, passphrase, store=store))
+
+    return results
+
+
+async def _decrypt_files_async(gpg: GPG, paths: List[Path], passphrase: str | None, session_key: str | None = None,
+                               show_session_key: bool = False, store: Snapshot | None = None) -> List[Decrypted]:
+    """
+    Decrypt a list of paths in the store with a single gpg subprocess, once the global semaphore allows it. If the
+    calling task is cancelled, gpg is killed and its plaintext removed.
+
+    Args:
+        gpg (GPG): a GPG context to build the gpg command line with.
+        paths (List[Path]): pass store paths.
+        passphrase (str | None): passphrase of the private key, if it has one.
+        session_key (str | None): session key to decrypt the paths with, instead of the private key.
+        show_session_key (bool): whether or not to capture the session key of every file. (default: False)
+        store (Snapshot | None): snapshot of the store to read the paths from, rather than the working tree.
+
+    Returns:
+        List[Decrypted]: each path with its b64enc'ed, decrypted bytes if we could decrypt it; None, otherwise.
+    """
+    results: List[Decrypted] = []
+    passphrase = None if session_key is not None else passphrase
+
+    async with _semaphore:
+        try:
+            # Copying ciphertext out of a snapshot blocks on git, so keep it off of the event loop.
+            status = await asyncio.to_thread(_DecryptFilesStatus, paths, store) if store is not None else _DecryptFilesStatus(paths)
+        except OSError as e:
+            log.error(e)
+            return [Decrypted(path, None) for path in paths]
+
+        args, fds = status.args(session_key, show_session_key)
+        process: asyncio.subprocess.Process | None = None
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *gpg.make_args(args, passphrase=bool(passphrase)),
+                stdin=asyncio.subprocess.PIPE if passphrase else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                pass_fds=fds
+            )
+
+            if passphrase and process.stdin:
+                process.stdin.write(f'{passphrase}\n'.encode(gpg.encoding))
+                await process.stdin.drain()
+                process.stdin.close()
+
+            assert process.stderr is not None
+
+            # python-gnupg directs gpg's status messages to stderr.
+            async for line in process.stderr:
+                decrypted = status.feed(line.decode(gpg.encoding, 'replace'))
+
+                if decrypted is not None:
+                    results.append(decrypted)
+
+            await process.wait()
+        except OSError as e:
+            log.error(e)
+        finally:
+            results += status.close()
+
+            if process is not None and process.returncode is None:
+                process.kill()
+                await asyncio.shield(process.wait())
+
+    return results
+
+
+def decrypt_bytes(path: Path, home: Path = Path('~/.gnupg').expanduser(), passphrase: str | None = None,
+                  store: Snapshot | None = None) -> str | None:
+    """
+    Decrypt a path in the store to a b64enc'ed string of bytes. gpg's output is streamed into a single buffer and
+    base64-encoded once, so values are never decoded to text and binary secrets are preserved.
 
     Args:
         path (Path): pass store path.
+        home (Path): GnuPG home directory (default: ~/.gnupg)
+        passphrase (str | None): passphrase of the private key, if it has one.
+        store (Snapshot | None): snapshot of the store to read the path from, rather than the working tree.
+
+    Returns:
+        str | None: base64'ed string of bytes if we could decrypt it; None, otherwise.
+    """
+    buffer = BytesIO()
+
+    def _on_data(chunk: bytes) -> bool:
+        buffer.write(chunk)
+
+        # Returning False stops python-gnupg from keeping its own copy of the output.
+        return False
+
+    try:
+        encrypted = BytesIO(store.read(path)) if store is not None else f'{path}.gpg'
+
+        with pool.context(home) as gpg:
+            gpg.on_data = _on_data
+
+            try:
+                decrypted_file = gpg.decrypt_file(
+                    encrypted,
+                    always_trust=True,
+                    passphrase=passphrase
+                )
+            finally:
+                gpg.on_data = None
+
+        if not decrypted_file.ok:
+            log.error(f'Failed to decrypt "{path}.gpg": {decrypted_file.status}')
+            return None
+
+        return _b64encode_plaintext(buffer.getbuffer())
+    except (IOError, PermissionError) as e:
+        log.error(e)
+        return None
+
+
+def _b64encode_plaintext(plaintext: bytes | memoryview) -> str:
+    """
+    base64 encode a decrypted value. Values that are valid UTF-8 are treated as text and have trailing whitespace
+    trimmed, as pass terminates entries with a newline. Anything else is binary and is encoded byte-for-byte.
+
+    Args:
+        plaintext (bytes | memoryview): the decrypted value.
 
     Returns:
-        bytes: base64'ed string of bytes.
+        str: the value b64-encoded.
     """
-    return ''
\ No newline at end of file
+    end = len(plaintext)
+
+    while end > 0 and plaintext[end - 1] in b' \t\n\r\x0b\x0c':
+        end -= 1
+
+    if end < len(plaintext):
+        try:
+            str(plaintext, 'utf-8')
+        except UnicodeDecodeError:
+            end = len(plaintext)
+
+    return base64.b64encode(plaintext[:end]).decode('ascii')
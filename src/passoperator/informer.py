@@ -0,0 +1,174 @@
+"""
+Keep a watch-backed, in-memory copy of the managed Secrets in the namespaces the operator watches, so reconciling a
+PassSecret compares against memory, and only writes go to the API server.
+"""
+
+
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Mapping, Set, Tuple, TypeAlias
+from threading import Lock
+from http import HTTPStatus
+from kubernetes import client
+
+from passoperator.kube import api_clients
+
+import logging
+
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'SecretInformer',
+    'managed_secrets',
+    'to_dict'
+]
+
+
+Key: TypeAlias = Tuple[str, str]
+
+
+def to_dict(secret: client.V1Secret) -> Dict[str, Any]:
+    """
+    Convert a Secret returned by the kubernetes client to its raw body, as the API server (and kopf) present it.
+
+    Args:
+        secret (client.V1Secret): a Secret.
+
+    Returns:
+        Dict[str, Any]: raw body of the Secret.
+    """
+    return api_clients.api_client().sanitize_for_serialization(secret)
+
+
+class SecretInformer:
+    """
+    A thread-safe cache of the raw bodies of managed Secrets, keyed by namespace and name.
+
+    The cache is primed with a single list call when the operator starts, and kept up-to-date by a watch (see
+    passoperator.daemon.inform) and by the operator's own writes. Only namespaces the operator watches are cached;
+    Secrets in any other namespace are read from the API server, as there's no watch to keep them fresh.
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._secrets: Dict[Key, Dict[str, Any]] = {}
+        self._namespaces: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._secrets)
+
+    def prime(self, namespace: str, secrets: Iterable[Mapping[str, Any]]) -> None:
+        """
+        Replace the cached Secrets of a namespace, and start serving it from the cache.
+
+        Args:
+            namespace (str): the namespace.
+            secrets (Iterable[Mapping[str, Any]]): raw bodies of every managed Secret in the namespace.
+        """
+        with self._lock:
+            self._secrets = {key: body for key, body in self._secrets.items() if key[0] != namespace}
+
+            for body in secrets:
+                self._secrets[(namespace, body['metadata']['name'])] = dict(body)
+
+            self._namespaces.add(namespace)
+
+        log.info(f'Cached {sum(key[0] == namespace for key in self._secrets)} managed Secrets in namespace "{namespace}"')
+
+    def watches(self, namespace: str) -> bool:
+        """
+        Check whether a namespace's Secrets are served from the cache.
+
+        Args:
+            namespace (str): the namespace.
+
+        Returns:
+            bool: True if the namespace was primed.
+        """
+        return namespace in self._namespaces
+
+    def update(self, body: Mapping[str, Any]) -> None:
+        """
+        Add or replace a Secret in the cache. Secrets in namespaces that aren't watched are ignored.
+
+        Args:
+            body (Mapping[str, Any]): raw body of the Secret.
+        """
+        if not self.watches(body['metadata']['namespace']):
+            return None
+
+        with self._lock:
+            self._secrets[(body['metadata']['namespace'], body['metadata']['name'])] = dict(body)
+
+    def remove(self, namespace: str, name: str) -> None:
+        """
+        Drop a Secret from the cache.
+
+        Args:
+            namespace (str): namespace of the Secret.
+            name (str): name of the Secret.
+        """
+        with self._lock:
+            self._secrets.pop((namespace, name), None)
+
+    def get(self, namespace: str, name: str) -> Dict[str, Any] | None:
+        """
+        Look up a Secret, from the cache if its namespace is watched, otherwise from the API server.
+
+        Args:
+            namespace (str): namespace of the Secret.
+            name (str): name of the Secret.
+
+        Returns:
+            Dict[str, Any] | None: raw body of the Secret, or None if it doesn't exist.
+
+        Raises:
+            client.ApiException: if the Secret had to be read from the API server, and couldn't be.
+        """
+        if self.watches(namespace):
+            with self._lock:
+                self.hits += 1
+                return self._secrets.get((namespace, name))
+
+        self.misses += 1
+
+        try:
+            return to_dict(api_clients.core().read_namespaced_secret(name=name, namespace=namespace))
+        except client.ApiException as e:
+            if e.status == HTTPStatus.NOT_FOUND:
+                return None
+
+            raise
+
+    def list(self, namespace: str) -> List[Dict[str, Any]]:
+        """
+        List the cached Secrets of a watched namespace.
+
+        Args:
+            namespace (str): the namespace.
+
+        Returns:
+            List[Dict[str, Any]]: raw bodies of the Secrets, or none if the namespace isn't watched.
+        """
+        with self._lock:
+            self.hits += 1
+            return [body for key, body in self._secrets.items() if key[0] == namespace]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report how many Secrets are cached, and how often lookups are served from the cache.
+
+        Returns:
+            Dict[str, int]: cache statistics.
+        """
+        with self._lock:
+            return {
+                'secrets': len(self._secrets),
+                'namespaces': len(self._namespaces),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+managed_secrets = SecretInformer()
@@ -0,0 +1,211 @@
+"""
+Share one pooled kubernetes API client between every handler, so requests reuse kept-alive connections to the API
+server instead of opening (and TLS-handshaking) a connection pool per handler call.
+"""
+
+
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+from threading import Lock
+from kubernetes import client
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from passoperator import env
+
+import logging
+import socket
+
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'ApiClientPool',
+    'api_clients'
+]
+
+
+class _PoolTimeout:
+    """
+    Bound how long a request waits for a pooled connection, as the kubernetes client doesn't pass urllib3 a pool
+    timeout, and a blocking pool would otherwise wait forever once it's saturated.
+    """
+    pool_timeout: float | None = None
+
+    def _get_conn(self, timeout: float | None = None) -> Any:
+        return super()._get_conn(timeout=self.pool_timeout if timeout is None else timeout)  # type: ignore[misc]
+
+
+class _PooledApiClient(client.ApiClient):
+    """
+    An ApiClient that applies default request timeouts, and counts requests in flight against its connection pool.
+    """
+    def __init__(self, pool: ApiClientPool, configuration: client.Configuration) -> None:
+        super().__init__(configuration)
+        self._client_pool = pool
+
+    def call_api(self, *args: Any, **kwargs: Any) -> Any:
+        if kwargs.get('_request_timeout') is None:
+            kwargs['_request_timeout'] = self._client_pool.timeout
+
+        self._client_pool._checkout()
+
+        try:
+            return super().call_api(*args, **kwargs)
+        finally:
+            self._client_pool._checkin()
+
+
+class ApiClientPool:
+    """
+    A process-wide kubernetes ApiClient, with a bounded pool of kept-alive connections to the API server.
+
+    Requests beyond the pool's size wait (up to the connect timeout) for a connection to be returned, rather than
+    opening a connection that's thrown away afterwards, so the stats report how often that happens (saturation) to
+    size the pool by.
+    """
+    def __init__(self, maxsize: int = 8, keepalive: int = 30, timeout: Tuple[float, float] = (5, 30)) -> None:
+        self.maxsize = maxsize
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.requests = 0
+        self.saturated = 0
+        self.peak = 0
+
+        self._lock = Lock()
+        self._in_flight = 0
+        self._api_client: _PooledApiClient | None = None
+
+    def api_client(self) -> client.ApiClient:
+        """
+        Retrieve the shared ApiClient, creating it from the loaded kube config on first use.
+
+        Returns:
+            client.ApiClient: the shared ApiClient.
+        """
+        with self._lock:
+            if self._api_client is None:
+                configuration = client.Configuration.get_default_copy()
+                configuration.connection_pool_maxsize = self.maxsize
+
+                self._api_client = _PooledApiClient(self, configuration)
+
+                # Connection pools are created per host on first use, from these arguments.
+                # Requests that find every connection in use wait up to the connect timeout for one, then fail.
+                pool_manager = self._api_client.rest_client.pool_manager
+                pool_manager.connection_pool_kw['block'] = True
+                pool_manager.connection_pool_kw['socket_options'] = self._socket_options()
+                pool_manager.pool_classes_by_scheme = {
+                    scheme: type(cls.__name__, (_PoolTimeout, cls), {'pool_timeout': self.timeout[0]})
+                    for scheme, cls in (('http', HTTPConnectionPool), ('https', HTTPSConnectionPool))
+                }
+
+                log.debug(f'Created shared API client with {self.maxsize} pooled connections')
+
+            return self._api_client
+
+    def core(self) -> client.CoreV1Api:
+        """
+        Retrieve the core API, for Secrets.
+
+        Returns:
+            client.CoreV1Api: the core API, on the shared ApiClient.
+        """
+        return client.CoreV1Api(self.api_client())
+
+    def custom(self) -> client.CustomObjectsApi:
+        """
+        Retrieve the custom objects API, for PassSecrets.
+
+        Returns:
+            client.CustomObjectsApi: the custom objects API, on the shared ApiClient.
+        """
+        return client.CustomObjectsApi(self.api_client())
+
+    def close(self) -> None:
+        """
+        Close the shared ApiClient's connections. The next request creates a new ApiClient.
+        """
+        with self._lock:
+            if self._api_client is not None:
+                self._api_client.rest_client.pool_manager.clear()
+                self._api_client.close()
+                self._api_client = None
+
+    def _socket_options(self) -> List[Tuple[int, int, int]]:
+        """
+        Build socket options that enable TCP keep-alive, so idle pooled connections survive (and dead ones are
+        detected) between requests.
+
+        Returns:
+            List[Tuple[int, int, int]]: socket options for urllib3.
+        """
+        options = list(HTTPConnection.default_socket_options)
+
+        if self.keepalive <= 0:
+            return options
+
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+
+        # These are platform-specific (e.g., TCP_KEEPIDLE is missing on macOS).
+        for name, value in (('TCP_KEEPIDLE', self.keepalive), ('TCP_KEEPINTVL', self.keepalive), ('TCP_KEEPCNT', 3)):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+
+        return options
+
+    def _checkout(self) -> None:
+        """
+        Count a request that's starting, and whether every pooled connection was already in use.
+        """
+        with self._lock:
+            self.requests += 1
+
+            if self._in_flight >= self.maxsize:
+                self.saturated += 1
+
+            self._in_flight += 1
+            self.peak = max(self.peak, self._in_flight)
+
+    def _checkin(self) -> None:
+        """
+        Count a request that's finished.
+        """
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> Dict[str, int | float]:
+        """
+        Report how many requests were made, how many are in flight, and how many had to wait for a pooled connection.
+
+        Returns:
+            Dict[str, int | float]: pool statistics.
+        """
+        with self._lock:
+            connections = 0
+
+            if self._api_client is not None:
+                pools = self._api_client.rest_client.pool_manager.pools
+
+                for key in pools.keys():
+                    pool = pools.get(key)
+
+                    if pool is not None:
+                        connections += pool.num_connections
+
+            return {
+                'maxsize': self.maxsize,
+                'connections': connections,
+                'in_flight': self._in_flight,
+                'peak': self.peak,
+                'requests': self.requests,
+                'saturated': self.saturated,
+                'saturation': round(self._in_flight / self.maxsize, 2)
+            }
+
+
+api_clients = ApiClientPool(
+    maxsize=int(env['OPERATOR_API_POOL_SIZE']),
+    keepalive=int(env['OPERATOR_API_KEEPALIVE']),
+    timeout=(float(env['OPERATOR_API_CONNECT_TIMEOUT']), float(env['OPERATOR_API_READ_TIMEOUT']))
+)
@@ -20,6 +20,7 @@ log = logging.getLogger(__name__)
 
 __all__ = [
     'lock',
+    'busy',
     'drain_event_queues'
 ]
 
@@ -197,6 +198,20 @@ def drain_event_queues() -> None:
         eventqueues.drain(queue)  # blocks
 
 
+def busy(body: kopf.Body | Dict[str, Any]) -> bool:
+    """
+    Check whether a handler is working on, or waiting to work on, an object. Anything reconciling objects outside of
+    their handlers, like the sweep, should leave busy objects to their handlers.
+
+    Args:
+        body (kopf.Body | Dict[str, Any]): raw body of the object.
+
+    Returns:
+        bool: True if the object's event queue isn't empty.
+    """
+    return eventqueues.qsize((body['kind'], body['metadata']['name'], body['metadata']['namespace'])) > 0
+
+
 def lock(wait: bool = True) -> Callable:
     """
     Decorator to halt handlers' progress or drop the handler altogether on an object's event until
@@ -0,0 +1,265 @@
+"""
+Track which PassSecrets refer to which paths in the password store, so that a change to the store only causes the
+PassSecrets it affects to be reconciled.
+"""
+
+
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Mapping, Set, Tuple, TypeAlias
+from dataclasses import dataclass, field
+from threading import Lock
+
+from passoperator.stores import DEFAULT_STORE
+
+import hashlib
+import json
+import logging
+
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'ReverseIndex',
+    'passsecrets',
+    'data_digest'
+]
+
+
+Key: TypeAlias = Tuple[str, str]
+
+# A path in a named store.
+StorePath: TypeAlias = Tuple[str, str]
+
+
+def data_digest(data: Mapping[str, str] | None) -> str:
+    """
+    Summarize a Secret's data, so we can tell whether it's changed without holding on to its values.
+
+    Args:
+        data (Mapping[str, str] | None): b64enc'ed Secret data.
+
+    Returns:
+        str: a digest of the data.
+    """
+    return hashlib.sha256(json.dumps(data or {}, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class _Entry:
+    """
+    A PassSecret's raw body, the store paths it refers to, how many times a path it refers to changed, and the state
+    of its managed Secret when it was last reconciled.
+    """
+    body: Dict[str, Any]
+    paths: Set[StorePath] = field(default_factory=set)
+    dirty: bool = True
+    changes: int = 0
+    reconciled: Tuple[Any, str] | None = None
+
+
+class ReverseIndex:
+    """
+    A thread-safe index from pass store paths (relative to the root of their store, without the .gpg suffix) to the
+    PassSecrets whose spec.encryptedData refer to them. Paths are indexed per store, so the same path in two stores
+    refers to two different files.
+
+    PassSecrets are dirty until they've been reconciled against the store, and become dirty again whenever a path
+    they refer to changes, or their spec changes.
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._entries: Dict[Key, _Entry] = {}
+        self._paths: Dict[StorePath, Set[Key]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(body: Mapping[str, Any]) -> Key:
+        """
+        Identify a PassSecret.
+
+        Args:
+            body (Mapping[str, Any]): raw body of the PassSecret.
+
+        Returns:
+            Key: namespace and name of the PassSecret.
+        """
+        return (body['metadata']['namespace'], body['metadata']['name'])
+
+    @staticmethod
+    def store(body: Mapping[str, Any]) -> str:
+        """
+        Name the store a PassSecret's paths are in.
+
+        Args:
+            body (Mapping[str, Any]): raw body of the PassSecret.
+
+        Returns:
+            str: name of the store.
+        """
+        return body['spec'].get('store') or DEFAULT_STORE
+
+    def update(self, body: Mapping[str, Any]) -> None:
+        """
+        Add or update a PassSecret in the index.
+
+        Args:
+            body (Mapping[str, Any]): raw body of the PassSecret.
+        """
+        key = self.key(body)
+        store = self.store(body)
+        paths = {(store, path.strip('/')) for path in body['spec']['encryptedData'].values()}
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                entry = self._entries[key] = _Entry(body=dict(body))
+            else:
+                self._unlink(key, entry.paths - paths)
+                entry.body = dict(body)
+
+            for path in paths - entry.paths:
+                self._paths.setdefault(path, set()).add(key)
+
+            entry.paths = paths
+
+    def remove(self, body: Mapping[str, Any]) -> None:
+        """
+        Drop a PassSecret from the index.
+
+        Args:
+            body (Mapping[str, Any]): raw body of the PassSecret.
+        """
+        key = self.key(body)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry is not None:
+                self._unlink(key, entry.paths)
+
+    def affected(self, paths: Iterable[str], store: str = DEFAULT_STORE) -> List[Dict[str, Any]]:
+        """
+        Find the PassSecrets that refer to any of a set of store paths and mark them dirty.
+
+        Args:
+            paths (Iterable[str]): paths of changed files, relative to the root of the password store. A .gpg suffix
+                is ignored.
+            store (str): name of the store the files changed in. (default: 'default')
+
+        Returns:
+            List[Dict[str, Any]]: raw bodies of the affected PassSecrets.
+        """
+        with self._lock:
+            keys: Set[Key] = set()
+
+            for path in paths:
+                keys |= self._paths.get((store, path.removesuffix('.gpg')), set())
+
+            for key in keys:
+                self._entries[key].dirty = True
+                self._entries[key].changes += 1
+
+            return [self._entries[key].body for key in keys]
+
+    def body(self, key: Key) -> Dict[str, Any] | None:
+        """
+        Look up a PassSecret's raw body.
+
+        Args:
+            key (Key): namespace and name of the PassSecret.
+
+        Returns:
+            Dict[str, Any] | None: raw body of the PassSecret, or None if it isn't indexed.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            return entry.body if entry is not None else None
+
+    def is_current(self, body: Mapping[str, Any], data: Mapping[str, str] | None) -> bool:
+        """
+        Check whether a PassSecret's managed Secret is as we left it, and nothing it refers to has changed since, in
+        which case there's no need to decrypt anything to reconcile it.
+
+        Args:
+            body (Mapping[str, Any]): raw body of the PassSecret.
+            data (Mapping[str, str] | None): current b64enc'ed data of the managed Secret.
+
+        Returns:
+            bool: True if the managed Secret is up-to-date with the store.
+        """
+        with self._lock:
+            entry = self._entries.get(self.key(body))
+
+            return entry is not None and not entry.dirty \
+                and entry.reconciled == (body['metadata'].get('generation'), data_digest(data))
+
+    def changes(self, body: Mapping[str, Any]) -> int:
+        """
+        Count how many times a path a PassSecret refers to has changed. Reconciles read this before they decrypt
+        anything, and hand it back to reconciled, so a change that lands mid-reconcile isn't lost.
+
+        Args:
+            body (Mapping[str, Any]): raw body of the PassSecret.
+
+        Returns:
+            int: number of changes, or 0 if the PassSecret isn't indexed.
+        """
+        with self._lock:
+            entry = self._entries.get(self.key(body))
+
+            return entry.changes if entry is not None else 0
+
+    def reconciled(self, body: Mapping[str, Any], data: Mapping[str, str] | None, changes: int) -> None:
+        """
+        Record that a PassSecret's managed Secret was reconciled against the store. The PassSecret stays dirty if a
+        path it refers to changed since the reconcile started, as the reconcile may have decrypted the old contents.
+
+        Args:
+            body (Mapping[str, Any]): raw body of the PassSecret.
+            data (Mapping[str, str] | None): b64enc'ed data of the managed Secret.
+            changes (int): the PassSecret's changes when the reconcile started (see changes).
+        """
+        with self._lock:
+            entry = self._entries.get(self.key(body))
+
+            if entry is not None:
+                entry.dirty = entry.changes != changes
+                entry.reconciled = (body['metadata'].get('generation'), data_digest(data))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report the size of the index.
+
+        Returns:
+            Dict[str, int]: index statistics.
+        """
+        with self._lock:
+            return {
+                'passsecrets': len(self._entries),
+                'paths': len(self._paths),
+                'dirty': sum(entry.dirty for entry in self._entries.values())
+            }
+
+    def _unlink(self, key: Key, paths: Iterable[StorePath]) -> None:
+        """
+        Remove a PassSecret from the entries of some paths.
+
+        Args:
+            key (Key): namespace and name of the PassSecret.
+            paths (Iterable[StorePath]): store names and paths.
+        """
+        for path in paths:
+            keys = self._paths.get(path)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._paths[path]
+
+
+passsecrets = ReverseIndex()
@@ -4,15 +4,18 @@ Provide interfaces for interacting with PassSecret manifests and encrypted data
 
 
 from __future__ import annotations
-from typing import Dict, Final, List
+from typing import Dict, Final, List, Tuple
 from pathlib import Path
 from attrs import define, asdict as to_dict
 from cattrs import structure as from_dict
 from humps import camelize
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from math import ceil
 
-from passoperator.gpg import decrypt
+from passoperator.gpg import decrypt_batch, decrypt_many
+from passoperator.store import Snapshot
+from passoperator.stores import get_store
+from passoperator.cache import plaintexts
 from passoperator.utils import b64Dec, b64Enc
 from passoperator import env
 
@@ -23,6 +26,10 @@ import logging
 log = logging.getLogger(__name__)
 
 
+# Label on every managed Secret.
+MANAGED_LABEL: Final[str] = 'secrets.premiscale.com/managed'
+
+
 @define
 class Metadata:
     """
@@ -64,7 +71,8 @@ class ManagedSecret:
         if not self.data and not self.stringData:
             return None
 
-        # Propagate one field to the other, make sure they match despite b64 conversion.
+        # Propagate one field to the other, make sure they match despite b64 conversion. Data on its own is left as-is,
+        # without a stringData counterpart, as it may not be text.
         if self.stringData and self.data:
             # Ensure stringData and data contain the same keys & values by iterating over both if both are set independently.
             for key in self.stringData:
@@ -78,11 +86,6 @@ class ManagedSecret:
                 else:
                     assert self.stringData[key] == b64Dec(self.data[key])
 
-        elif self.data and not self.stringData:
-            self.stringData = {
-                key: b64Dec(value) for key, value in self.data.items()
-            }
-
         elif self.stringData and not self.data:
             self.data = {
                 key: b64Enc(value) for key, value in self.stringData.items()
@@ -95,6 +98,12 @@ class ManagedSecret:
         self.metadata.annotations['secrets.premiscale.com/managed'] = 'true'
         self.metadata.annotations['secrets.premiscale.com/last-updated'] = datetime.now().isoformat()
 
+        # Label managed secrets too, so they can be listed with a label selector.
+        if self.metadata.labels is None:
+            self.metadata.labels = {}
+
+        self.metadata.labels[MANAGED_LABEL] = 'true'
+
         return None
 
     def to_dict(self, export: bool = False) -> Dict:
@@ -110,7 +119,7 @@ class ManagedSecret:
         d = to_dict(self, filter=lambda a, v: v is not None and v is not False)
 
         if export:
-            d.pop('stringData')
+            d.pop('stringData', None)
 
         return d
 
@@ -173,7 +182,7 @@ class ManagedSecret:
 
         # Camelize the body to match the PassSecret object's fields, but keep the data fields as-is.
         camelized_body = dict(camelize(dict(body)))
-        camelized_body['data'] = dict(body)['data']
+        camelized_body['data'] = dict(body).get('data')
 
         return from_dict(
             camelized_body,
@@ -189,49 +198,154 @@ class PassSecretSpec:
     """
     encryptedData: Dict[str, str]
     managedSecret: ManagedSecret
+    store: str | None = None
 
     def __attrs_post_init__(self) -> None:
         # Post-process the managedSecret field to decrypt the contents of the managedSecret.
-        self.managedSecret = self.decrypt(self.managedSecret, self.encryptedData)
+        self.managedSecret = self.decrypt(self.managedSecret, self.encryptedData, self.store)
 
     @staticmethod
-    def decrypt(ms: ManagedSecret, encryptedData: Dict[str, str]) -> ManagedSecret:
+    def decrypt(ms: ManagedSecret, encryptedData: Dict[str, str], store: str | None = None) -> ManagedSecret:
         """
         Decrypt the contents of this PassSecret's paths before returning the spec object.
+
+        Raises:
+            ValueError: if the PassSecret refers to a store that isn't configured.
         """
-        stringData = {}
+        return ManagedSecret(
+            metadata=ms.metadata,
+            data=PassSecretSpec.decrypt_data(encryptedData, store),
+            immutable=ms.immutable,
+            type=ms.type
+        )
 
-        with ThreadPoolExecutor(max_workers=int(env['PASS_DECRYPT_THREADS'])) as executor:
-            threads: Dict = {}
+    @staticmethod
+    def decrypt_data(encryptedData: Dict[str, str], store: str | None = None) -> Dict[str, str]:
+        """
+        Decrypt a mapping of secret keys to pass store paths. Values whose .gpg files are unchanged since they were last
+        decrypted are served from the in-memory cache, and every other path is decrypted once, however many keys refer
+        to it. Decrypted bytes are base64-encoded straight into the data, so binary values survive intact.
 
-            # Decrypt each secret in a separate thread and store the result in a dictionary.
-            for secretKey in encryptedData:
-                secretPath = encryptedData[secretKey]
+        Every path is read from the same snapshot of the store, so a pull that lands mid-decryption can't leave the
+        managed secret with values from two different commits.
 
-                # Because we're only decrypting, this operation should be threadsafe.
-                threads[secretKey] = executor.submit(
-                    decrypt,
-                    Path(f'{env["PASS_DIRECTORY"]}/{secretPath}'),
-                    passphrase=env['PASS_GPG_PASSPHRASE']
-                )
+        Args:
+            encryptedData (Dict[str, str]): secret keys mapped to pass store paths.
+            store (str | None): name of the store the paths are in, or None for the default store.
 
-            for secretKey in threads:
-                thread = threads[secretKey]
-                decryptedSecret = thread.result()
+        Returns:
+            Dict[str, str]: b64enc'ed values by secret key, or '' for paths that couldn't be decrypted.
 
-                if decryptedSecret is not None:
-                    stringData[secretKey] = decryptedSecret
-                else:
-                    log.error(f'Failed to decrypt secret at path: {secretPath}')
-                    stringData[secretKey] = ''
+        Raises:
+            ValueError: if the store isn't configured.
+        """
+        passStore = get_store(store)
+
+        with passStore.snapshots.acquire() as snapshot:
+            data, blobs, misses = PassSecretSpec._lookup_cached(encryptedData, snapshot)
+
+            # Decrypt everything we couldn't serve from the cache in batches, a handful of gpg processes at a time.
+            for secretPath, decryptedSecret, _ in decrypt_batch(
+                    misses,
+                    home=passStore.home,
+                    passphrase=passStore.passphrase,
+                    workers=min(int(env['PASS_DECRYPT_THREADS']), ceil(len(misses) / max(1, int(env['PASS_DECRYPT_BATCH_SIZE'])))),
+                    blobs=PassSecretSpec._miss_blobs(misses, blobs),
+                    store=snapshot):
+                PassSecretSpec._store_decrypted(data, blobs, misses[secretPath], decryptedSecret, encryptedData)
+
+        return data
+
+    @staticmethod
+    async def decrypt_async(ms: ManagedSecret, encryptedData: Dict[str, str], store: str | None = None) -> ManagedSecret:
+        """
+        Decrypt the contents of this PassSecret's paths on the event loop, for async handlers. This behaves like
+        decrypt, but gpg subprocesses are bounded by a single semaphore across the operator instead of by a thread pool
+        per call.
+        """
+        passStore = get_store(store)
+
+        with passStore.snapshots.acquire() as snapshot:
+            data, blobs, misses = PassSecretSpec._lookup_cached(encryptedData, snapshot)
+
+            decrypted = await decrypt_many(
+                misses,
+                home=passStore.home,
+                passphrase=passStore.passphrase,
+                blobs=PassSecretSpec._miss_blobs(misses, blobs),
+                store=snapshot
+            )
+
+        for secretPath, decryptedSecret in decrypted.items():
+            PassSecretSpec._store_decrypted(data, blobs, misses[secretPath], decryptedSecret, encryptedData)
 
         return ManagedSecret(
             metadata=ms.metadata,
-            stringData=stringData,
+            data=data,
             immutable=ms.immutable,
             type=ms.type
         )
 
+    @staticmethod
+    def _lookup_cached(encryptedData: Dict[str, str], store: Snapshot) -> Tuple[Dict[str, str], Dict[str, str], Dict[Path, List[str]]]:
+        """
+        Serve what we can of encryptedData from the decrypted value cache.
+
+        Args:
+            encryptedData (Dict[str, str]): secret keys mapped to pass store paths.
+            store (Snapshot): the snapshot of the store that's being decrypted.
+
+        Returns:
+            Tuple[Dict[str, str], Dict[str, str], Dict[Path, List[str]]]: cached b64enc'ed values by secret key, blob
+                IDs by secret key, and the secret keys of every pass store path that still needs decrypting.
+        """
+        data: Dict[str, str] = {}
+        blobs: Dict[str, str] = {}
+
+        for secretKey, secretPath in encryptedData.items():
+            blob = store.blob_id(secretPath)
+
+            if blob is None:
+                continue
+
+            blobs[secretKey] = blob
+
+            cachedSecret = plaintexts.get(blobs[secretKey])
+
+            if cachedSecret is not None:
+                data[secretKey] = cachedSecret
+
+        misses: Dict[Path, List[str]] = {}
+
+        for secretKey, secretPath in encryptedData.items():
+            if secretKey not in data:
+                misses.setdefault(Path(f'{store.directory}/{secretPath}'), []).append(secretKey)
+
+        return data, blobs, misses
+
+    @staticmethod
+    def _miss_blobs(misses: Dict[Path, List[str]], blobs: Dict[str, str]) -> Dict[Path, str]:
+        """
+        Key blob IDs by pass store path, rather than secret key, for the paths that need decrypting.
+        """
+        return {secretPath: blobs[secretKeys[0]] for secretPath, secretKeys in misses.items() if secretKeys[0] in blobs}
+
+    @staticmethod
+    def _store_decrypted(data: Dict[str, str], blobs: Dict[str, str], secretKeys: List[str], decryptedSecret: str | None,
+                         encryptedData: Dict[str, str]) -> None:
+        """
+        Record a decrypted value under every secret key that refers to its path, and cache it.
+        """
+        for secretKey in secretKeys:
+            if decryptedSecret is not None:
+                data[secretKey] = decryptedSecret
+
+                if secretKey in blobs:
+                    plaintexts.put(blobs[secretKey], decryptedSecret)
+            else:
+                log.error(f'Failed to decrypt secret at path: {encryptedData[secretKey]}')
+                data[secretKey] = ''
+
     def to_dict(self) -> Dict:
         """
         Output this object as a K8s manifest dictionary.
@@ -239,11 +353,16 @@ class PassSecretSpec:
         Returns:
             Dict: this object as a dict.
         """
-        return {
+        d = {
             'encryptedData': self.encryptedData,
             'managedSecret': self.managedSecret.to_dict(export=True)
         }
 
+        if self.store is not None:
+            d['store'] = self.store
+
+        return d
+
 
 @define
 class PassSecret:
@@ -0,0 +1,93 @@
+"""
+Serve the operator's own HTTP endpoints: a readiness endpoint that reflects the freshness of the password store, and
+the push webhook endpoint, if it's enabled. Kopf's liveness endpoint is served separately, on port 8080.
+"""
+
+
+from __future__ import annotations
+from aiohttp import web
+from http import HTTPStatus
+
+from passoperator.stores import stores
+from passoperator.webhook import handle_push, MAX_PAYLOAD_BYTES
+from passoperator import env
+
+import logging
+
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'application',
+    'start',
+    'stop'
+]
+
+
+_runner: web.AppRunner | None = None
+
+
+async def handle_ready(_: web.Request) -> web.Response:
+    """
+    Report whether the operator is ready. It isn't while any password store is stale, as the Secrets it manages may be
+    out-of-date with the remote.
+
+    Returns:
+        web.Response: 200 if every store is fresh, otherwise 503, with each store's pull statistics either way.
+    """
+    stats = {name: passStore.scheduler.stats() for name, passStore in stores.items()}
+
+    return web.json_response(
+        stats,
+        status=HTTPStatus.SERVICE_UNAVAILABLE if any(store['stale'] for store in stats.values()) else HTTPStatus.OK
+    )
+
+
+def application() -> web.Application:
+    """
+    Build the operator's application.
+
+    Returns:
+        web.Application: an aiohttp application that serves GET /readyz, and POST /webhook (for the default store)
+            and /webhook/{store} if PASS_WEBHOOK_SECRET is set to authenticate pushes with.
+    """
+    app = web.Application(client_max_size=MAX_PAYLOAD_BYTES)
+    app.router.add_get('/readyz', handle_ready)
+
+    if env['PASS_WEBHOOK_SECRET']:
+        app.router.add_post('/webhook', handle_push)
+        app.router.add_post('/webhook/{store}', handle_push)
+
+    return app
+
+
+async def start() -> None:
+    """
+    Serve the operator's endpoints on the pod IP at OPERATOR_HTTP_PORT, on the running event loop.
+    """
+    global _runner
+
+    app = application()
+
+    _runner = web.AppRunner(app, access_log=None)
+    await _runner.setup()
+    await web.TCPSite(_runner, host=env['OPERATOR_POD_IP'], port=int(env['OPERATOR_HTTP_PORT'])).start()
+
+    log.info(
+        f'Serving {", ".join(sorted(resource.canonical for resource in app.router.resources()))} '
+        f'at http://{env["OPERATOR_POD_IP"]}:{env["OPERATOR_HTTP_PORT"]}'
+    )
+
+    if not env['PASS_WEBHOOK_SECRET']:
+        log.info('PASS_WEBHOOK_SECRET is not set, not serving push webhooks')
+
+
+async def stop() -> None:
+    """
+    Stop serving the operator's endpoints, if they're being served.
+    """
+    global _runner
+
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
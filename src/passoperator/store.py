@@ -0,0 +1,301 @@
+"""
+Read the password store at a pinned commit straight from git's object database, so decryption doesn't depend on a
+checked-out working tree, and readers see consistent, immutable snapshots of the store while pulls move HEAD.
+"""
+
+
+from __future__ import annotations
+from typing import Any, Dict, Iterator, Set, Tuple
+from pathlib import Path, PurePosixPath
+from threading import Lock
+from contextlib import contextmanager
+from git import Repo
+from git.exc import BadName, BadObject, GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+
+from passoperator import env
+
+import binascii
+import logging
+
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'Snapshot',
+    'Snapshots'
+]
+
+
+class Snapshot:
+    """
+    The files of the password store at a single commit. Paths are resolved to blob IDs with one 'git ls-tree' when the
+    snapshot is taken, and blobs are streamed from the object database by a long-running 'git cat-file --batch'
+    process, which reads packfiles in place (and fetches blobs on demand from the remote of a partial clone).
+
+    Snapshots are safe to share between threads, and may be pickled to hand to worker processes, which re-open the
+    repository on first use.
+    """
+    def __init__(self, commit: str, blobs: Dict[str, str], directory: str | None = None) -> None:
+        """
+        Args:
+            commit (str): the commit SHA the snapshot is pinned to.
+            blobs (Dict[str, str]): blob SHAs of every file at the commit, keyed by path relative to the root of the
+                repository.
+            directory (str | None): the password store's repository. (default: PASS_DIRECTORY)
+        """
+        self.commit = commit
+        self.blobs = blobs
+        self.directory = directory if directory is not None else env['PASS_DIRECTORY']
+
+        self._lock = Lock()
+        self._repo: Repo | None = None
+
+    def __repr__(self) -> str:
+        return f'Snapshot(commit={self.commit!r}, files={len(self.blobs)})'
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (Snapshot, (self.commit, self.blobs, self.directory))
+
+    @classmethod
+    def at(cls, commit: str = 'HEAD', directory: str | None = None) -> Snapshot:
+        """
+        Take a snapshot of the password store.
+
+        Args:
+            commit (str): a commit-ish to pin the snapshot to. (default: 'HEAD')
+            directory (str | None): the password store's repository. (default: PASS_DIRECTORY)
+
+        Returns:
+            Snapshot: the store at the commit.
+        """
+        with Repo(directory if directory is not None else env['PASS_DIRECTORY']) as repo:
+            sha = repo.commit(commit).hexsha
+            tree = repo.git.ls_tree('-r', '-z', '--full-tree', sha)
+
+        blobs: Dict[str, str] = {}
+
+        for entry in tree.split('\0'):
+            if not entry:
+                continue
+
+            meta, path = entry.split('\t', 1)
+            _, kind, blob = meta.split(' ')
+
+            if kind == 'blob':
+                blobs[path] = blob
+
+        return cls(sha, blobs, directory)
+
+    def relative(self, path: Path | str, suffix: str = '.gpg') -> str:
+        """
+        Resolve a pass store path to a path in the repository.
+
+        Args:
+            path (Path | str): a pass store path, either absolute (under PASS_DIRECTORY) or relative to the root of
+                the store.
+            suffix (str): suffix of the file the path refers to. (default: '.gpg')
+
+        Returns:
+            str: the file's path relative to the root of the repository.
+        """
+        if Path(path).is_absolute():
+            try:
+                path = Path(path).relative_to(self.directory)
+            except ValueError:
+                pass
+
+        return f'{PurePosixPath(Path(path).as_posix().strip("/"))}{suffix}'
+
+    def blob_id(self, path: Path | str, suffix: str = '.gpg') -> str | None:
+        """
+        Identify the contents of a file in the store without reading it.
+
+        Args:
+            path (Path | str): a pass store path.
+            suffix (str): suffix of the file the path refers to. (default: '.gpg')
+
+        Returns:
+            str | None: the file's blob SHA, or None if it isn't in the store at this commit.
+        """
+        return self.blobs.get(self.relative(path, suffix))
+
+    def blob_ids(self, suffix: str = '') -> Set[str]:
+        """
+        Collect the blob SHAs of every file in the store.
+
+        Args:
+            suffix (str): only collect files whose names end with this suffix. (default: '')
+
+        Returns:
+            Set[str]: blob SHAs.
+        """
+        return {blob for path, blob in self.blobs.items() if path.endswith(suffix)}
+
+    def read(self, path: Path | str, suffix: str = '.gpg') -> bytes:
+        """
+        Read a file from the store.
+
+        Args:
+            path (Path | str): a pass store path.
+            suffix (str): suffix of the file the path refers to. (default: '.gpg')
+
+        Returns:
+            bytes: the file's contents.
+
+        Raises:
+            FileNotFoundError: if the file isn't in the store at this commit, or its blob can't be read.
+        """
+        blob = self.blob_id(path, suffix)
+
+        if blob is None:
+            raise FileNotFoundError(f'"{self.relative(path, suffix)}" does not exist in the password store at {self.commit}')
+
+        # GitPython's persistent 'git cat-file' process serves one request at a time.
+        with self._lock:
+            if self._repo is None:
+                self._repo = Repo(self.directory)
+
+            try:
+                return self._repo.odb.stream(binascii.unhexlify(blob)).read()
+            except (BadObject, BadName, GitCommandError, ValueError) as e:
+                raise FileNotFoundError(f'Could not read blob {blob} of "{self.relative(path, suffix)}": {e}') from e
+
+    def close(self) -> None:
+        """
+        Stop the snapshot's 'git cat-file' process, if it started one.
+        """
+        with self._lock:
+            if self._repo is not None:
+                self._repo.close()
+                self._repo = None
+
+
+class Snapshots:
+    """
+    Publish snapshots of the password store to readers.
+
+    A pull publishes a snapshot of the commit it fetched by swapping it in for the current one, so readers never wait
+    on a pull, and readers that already hold the previous snapshot keep reading it undisturbed. Each published commit
+    is pinned by a ref under refs/passoperator/snapshots/, so that git can't prune its objects (say, after a force
+    push) while they're being read. A superseded snapshot is freed, unpinning its commit and stopping its 'git
+    cat-file' process, as soon as its last reader releases it.
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._generation = 0
+
+        # Snapshots that are published or still being read, with their pin ref and number of readers.
+        self._current = Snapshot('', {})
+        self._live: Dict[int, Tuple[Snapshot, str | None, int]] = {id(self._current): (self._current, None, 0)}
+
+    @property
+    def commit(self) -> str:
+        """
+        The commit of the current snapshot, or '' if nothing's been published yet.
+        """
+        with self._lock:
+            return self._current.commit
+
+    @contextmanager
+    def acquire(self) -> Iterator[Snapshot]:
+        """
+        Read the current snapshot of the store. The snapshot stays pinned, and readable, until the context exits.
+
+        Yields:
+            Snapshot: the most recently published snapshot, or an empty one if nothing's been published yet.
+        """
+        with self._lock:
+            snapshot = self._current
+            entry = self._live[id(snapshot)]
+            self._live[id(snapshot)] = (snapshot, entry[1], entry[2] + 1)
+
+        try:
+            yield snapshot
+        finally:
+            self._release(snapshot)
+
+    def publish(self, commit: str = 'HEAD', directory: str | None = None) -> Snapshot:
+        """
+        Take a snapshot of the store at a commit and make it the current snapshot. Publishing the commit that's
+        already current is a no-op.
+
+        Args:
+            commit (str): a commit-ish to pin the snapshot to. (default: 'HEAD')
+            directory (str | None): the password store's repository. (default: PASS_DIRECTORY)
+
+        Returns:
+            Snapshot: the current snapshot.
+        """
+        directory = directory if directory is not None else env['PASS_DIRECTORY']
+
+        with Repo(directory) as repo:
+            sha = repo.commit(commit).hexsha
+
+        if sha == self._current.commit and directory == self._current.directory:
+            return self._current
+
+        snapshot = Snapshot.at(sha, directory)
+
+        with self._lock:
+            self._generation += 1
+            ref = f'refs/passoperator/snapshots/{self._generation}'
+
+        with Repo(directory) as repo:
+            repo.git.update_ref(ref, sha)
+
+        with self._lock:
+            previous, self._current = self._current, snapshot
+            self._live[id(snapshot)] = (snapshot, ref, 0)
+
+        log.debug(f'Published a snapshot of the password store at {sha} with {len(snapshot.blobs)} files')
+
+        # The previous snapshot is freed right away, unless it's still being read.
+        self._release(previous, acquired=False)
+
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the current snapshot, and how many snapshots and readers are live.
+
+        Returns:
+            Dict[str, Any]: snapshot statistics.
+        """
+        with self._lock:
+            return {
+                'commit': self._current.commit,
+                'snapshots': len(self._live),
+                'readers': sum(readers for _, _, readers in self._live.values())
+            }
+
+    def _release(self, snapshot: Snapshot, acquired: bool = True) -> None:
+        """
+        Drop a reader of a snapshot, freeing the snapshot if it's been superseded and this was its last reader.
+
+        Args:
+            snapshot (Snapshot): a snapshot.
+            acquired (bool): whether the caller had acquired the snapshot, or just superseded it. (default: True)
+        """
+        with self._lock:
+            _, ref, readers = self._live[id(snapshot)]
+            readers -= acquired
+
+            if readers or snapshot is self._current:
+                self._live[id(snapshot)] = (snapshot, ref, readers)
+                return None
+
+            del self._live[id(snapshot)]
+
+        snapshot.close()
+
+        if ref is not None:
+            try:
+                with Repo(snapshot.directory) as repo:
+                    repo.git.update_ref('-d', ref)
+            except (GitCommandError, InvalidGitRepositoryError, NoSuchPathError) as e:
+                log.warning(f'Could not unpin the snapshot of the password store at {snapshot.commit}: {e}')
+
+        log.debug(f'Freed the snapshot of the password store at {snapshot.commit}')
+
+        return None
+
@@ -0,0 +1,211 @@
+"""
+Manage the set of password store repositories the operator syncs and decrypts. The store configured by the PASS_*
+environment variables is named 'default', and PASS_STORES may define more, which PassSecrets select with spec.store.
+"""
+
+
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Set
+from pathlib import Path
+from threading import Lock
+from gnupg import GPG
+
+from passoperator.store import Snapshots
+from passoperator.git import PullScheduler
+from passoperator import env
+
+import asyncio
+import base64
+import json
+import logging
+import re
+import sys
+
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'DEFAULT_STORE',
+    'Store',
+    'stores',
+    'get_store',
+    'load_stores'
+]
+
+
+DEFAULT_STORE = 'default'
+
+# Store names become directory names and URL path segments.
+_STORE_NAME = re.compile(r'^[a-z0-9]([-a-z0-9]*[a-z0-9])?$')
+
+
+class Store:
+    """
+    A password store repository: where it's cloned from and to, the key that decrypts it, and the state of its pull
+    loop and published snapshots. Each store has its own GnuPG home, so its key (and pool of GPG contexts) is kept
+    apart from every other store's.
+    """
+    def __init__(self, name: str, url: str, branch: str, directory: str, home: Path, key_id: str,
+                 passphrase: str | None = None, key_file: Path | None = None, passphrase_file: Path | None = None) -> None:
+        """
+        Args:
+            name (str): name of the store, as PassSecrets refer to it in spec.store.
+            url (str): (SSH) URL of the store's git repository.
+            branch (str): branch of the repository to sync.
+            directory (str): directory to clone the repository into.
+            home (Path): GnuPG home directory to decrypt the store with.
+            key_id (str): ID of the private key the store is encrypted to, as in its .gpg-id.
+            passphrase (str | None): passphrase of the private key, if it has one.
+            key_file (Path | None): file to import the private key from (ASCII-armored, or b64enc'ed ASCII-armored),
+                if it isn't in the GnuPG home already.
+            passphrase_file (Path | None): file to read the passphrase of the private key from, instead of passphrase.
+        """
+        self.name = name
+        self.url = url
+        self.branch = branch
+        self.directory = directory
+        self.home = home
+        self.key_id = key_id
+        self.passphrase = passphrase
+        self.key_file = key_file
+        self.passphrase_file = passphrase_file
+
+        self.scheduler = PullScheduler()
+        self.snapshots = Snapshots()
+
+        # Set to ask the pull loop to check the remote before its interval is up.
+        self.pull_requested = asyncio.Event()
+
+        # Set, and replaced, each time the pull loop completes a pull, with HEAD as of the last clone or pull.
+        self.pulled = asyncio.Event()
+        self.head = ''
+
+        # Directories checked out of a sparse clone of the store, or None if the store was cloned in full.
+        self.sparse_lock = Lock()
+        self.sparse_dirs: Set[str] | None = None
+
+    def __repr__(self) -> str:
+        return f'Store(name={self.name!r}, url={self.url!r}, branch={self.branch!r})'
+
+    @classmethod
+    def from_config(cls, name: str, config: Mapping[str, Any]) -> Store:
+        """
+        Define a store from an entry of PASS_STORES.
+
+        Args:
+            name (str): name of the store.
+            config (Mapping[str, Any]): the store's 'url', 'keyId', and optionally 'branch' (default: main), 'keyFile'
+                and 'passphraseFile'.
+
+        Returns:
+            Store: the store.
+
+        Raises:
+            ValueError: if the store's name or configuration is invalid.
+        """
+        if not _STORE_NAME.match(name) or name == DEFAULT_STORE:
+            raise ValueError(f'Invalid store name "{name}", store names must be DNS labels other than "{DEFAULT_STORE}"')
+
+        for field in ('url', 'keyId'):
+            if not config.get(field):
+                raise ValueError(f'Store "{name}" is missing "{field}"')
+
+        return cls(
+            name=name,
+            url=config['url'],
+            branch=config.get('branch', 'main'),
+            directory=str(Path(f'~/.password-stores/{name}').expanduser()),
+            home=Path(f'~/.gnupg-stores/{name}').expanduser(),
+            key_id=config['keyId'],
+            key_file=Path(config['keyFile']) if config.get('keyFile') else None,
+            passphrase_file=Path(config['passphraseFile']) if config.get('passphraseFile') else None
+        )
+
+    def import_key(self) -> None:
+        """
+        Set up the store's GnuPG home, importing its private key if it's provided in a file. The default store's key
+        is imported by the container's entrypoint instead.
+
+        Raises:
+            ValueError: if the key couldn't be imported.
+        """
+        if self.passphrase_file is not None:
+            self.passphrase = self.passphrase_file.read_text(encoding='utf-8').rstrip('\n')
+
+        if self.key_file is None:
+            return None
+
+        self.home.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+        key = self.key_file.read_text(encoding='utf-8')
+
+        if 'BEGIN PGP' not in key:
+            key = base64.b64decode(key).decode('utf-8')
+
+        result = GPG(gnupghome=str(self.home)).import_keys(key, passphrase=self.passphrase)
+
+        if not result.count:
+            raise ValueError(f'Could not import the private key of store "{self.name}": {result.stderr}')
+
+        log.info(f'Imported {result.count} key(s) for store "{self.name}"')
+
+        return None
+
+
+def load_stores() -> Dict[str, Store]:
+    """
+    Define the default store from the PASS_* environment variables, and any others from PASS_STORES.
+
+    Returns:
+        Dict[str, Store]: every store, keyed by name.
+
+    Raises:
+        ValueError: if PASS_STORES is invalid.
+    """
+    loaded = {
+        DEFAULT_STORE: Store(
+            name=DEFAULT_STORE,
+            url=env['PASS_GIT_URL'],
+            branch=env['PASS_GIT_BRANCH'],
+            directory=env['PASS_DIRECTORY'],
+            home=Path('~/.gnupg').expanduser(),
+            key_id=env['PASS_GPG_KEY_ID'],
+            passphrase=env['PASS_GPG_PASSPHRASE']
+        )
+    }
+
+    configs = json.loads(env['PASS_STORES'] or '{}')
+
+    if not isinstance(configs, dict) or not all(isinstance(config, dict) for config in configs.values()):
+        raise ValueError('PASS_STORES must be a JSON object of store names to their configuration')
+
+    for name, config in configs.items():
+        loaded[name] = Store.from_config(name, config)
+
+    return loaded
+
+
+try:
+    stores: Dict[str, Store] = load_stores()
+except ValueError as e:
+    log.error(e)
+    sys.exit(1)
+
+
+def get_store(name: str | None = None) -> Store:
+    """
+    Look up a store by name.
+
+    Args:
+        name (str | None): name of the store, or None for the default store.
+
+    Returns:
+        Store: the store.
+
+    Raises:
+        ValueError: if there's no such store.
+    """
+    try:
+        return stores[name or DEFAULT_STORE]
+    except KeyError:
+        raise ValueError(f'Unknown store "{name}", stores are: {", ".join(sorted(stores))}') from None
@@ -0,0 +1,105 @@
+"""
+Handle git push webhooks, so that changes to the password store are pulled as soon as they're pushed,
+rather than when the pull loop next polls the remote.
+"""
+
+
+from __future__ import annotations
+from typing import Any, Dict
+from urllib.parse import parse_qs
+from aiohttp import web
+from http import HTTPStatus
+
+from passoperator.git import request_pull
+from passoperator.stores import get_store
+from passoperator import env
+
+import hashlib
+import hmac
+import json
+import logging
+
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    'verify_signature',
+    'handle_push',
+    'MAX_PAYLOAD_BYTES'
+]
+
+
+# Headers that git servers send the HMAC-SHA256 signature of a payload in, in order of preference. GitHub (and Gitea,
+# for compatibility) prefix the digest with 'sha256='.
+SIGNATURE_HEADERS = (
+    'X-Hub-Signature-256',
+    'X-Gitea-Signature',
+    'X-Gogs-Signature'
+)
+
+# GitHub allows push payloads of up to 25MiB.
+MAX_PAYLOAD_BYTES = 25 * 1024 ** 2
+
+def verify_signature(secret: str, payload: bytes, signature: str | None) -> bool:
+    """
+    Check a payload's HMAC-SHA256 signature against the shared secret.
+
+    Args:
+        secret (str): the shared secret.
+        payload (bytes): the raw request body.
+        signature (str | None): the hex digest sent with the payload, optionally prefixed with 'sha256='.
+
+    Returns:
+        bool: True if the signature is valid.
+    """
+    if not secret or not signature:
+        return False
+
+    expected = hmac.new(secret.encode('utf-8'), payload, hashlib.sha256).hexdigest()
+
+    return hmac.compare_digest(expected, signature.removeprefix('sha256=').strip().lower())
+
+
+async def handle_push(request: web.Request) -> web.Response:
+    """
+    Handle a push webhook for the store named in the path, or the default store. Authenticated pushes to the store's
+    branch ask its pull loop to pull right away; pushes to other branches are acknowledged and ignored.
+
+    Args:
+        request (web.Request): the webhook request.
+
+    Returns:
+        web.Response: 202 if the push was accepted, or an error status.
+    """
+    payload = await request.read()
+    signature = next((request.headers[header] for header in SIGNATURE_HEADERS if header in request.headers), None)
+
+    if not verify_signature(env['PASS_WEBHOOK_SECRET'], payload, signature):
+        log.warning(f'Rejected webhook from {request.remote} with a missing or invalid signature')
+        return web.json_response({'status': 'unauthorized'}, status=HTTPStatus.UNAUTHORIZED)
+
+    try:
+        store = get_store(request.match_info.get('store'))
+    except ValueError:
+        return web.json_response({'status': 'unknown store'}, status=HTTPStatus.NOT_FOUND)
+
+    try:
+        if request.content_type == 'application/x-www-form-urlencoded':
+            # GitHub can send the JSON payload as a form field instead of the body.
+            body: Dict[str, Any] = json.loads(parse_qs(payload.decode('utf-8')).get('payload', ['{}'])[0])
+        else:
+            body = json.loads(payload or b'{}')
+    except (UnicodeDecodeError, ValueError):
+        return web.json_response({'status': 'malformed payload'}, status=HTTPStatus.BAD_REQUEST)
+
+    ref = body.get('ref') if isinstance(body, dict) else None
+
+    # Pings and other events without a ref still trigger a pull, which is cheap if nothing changed.
+    if ref is not None and ref != f'refs/heads/{store.branch}':
+        log.debug(f'Ignoring push to {ref}')
+        return web.json_response({'status': 'ignored'}, status=HTTPStatus.ACCEPTED)
+
+    log.info(f'Received push webhook for {ref or "the password store"} of store "{store.name}", requesting a pull')
+    request_pull(store)
+
+    return web.json_response({'status': 'accepted'}, status=HTTPStatus.ACCEPTED)
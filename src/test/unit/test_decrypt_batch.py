@@ -0,0 +1,93 @@
+"""
+Verify that passoperator.gpg.decrypt_batch decrypts pass store paths in batches, and recovers from a broken pool of
+worker processes.
+"""
+
+
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from subprocess import run
+from pathlib import Path
+
+from passoperator import env, gpg
+
+import base64
+import os
+
+
+class DecryptBatch(TestCase):
+    """
+    Test decrypting a throwaway password store with gpg --decrypt-files.
+    """
+
+    def setUp(self) -> None:
+        """
+        Generate a GnuPG home with a fresh key and a small store encrypted to it.
+        """
+        self._tmp = TemporaryDirectory()
+        self._env = env.copy()
+        self.home = Path(self._tmp.name) / 'gnupg'
+        self.store = Path(self._tmp.name) / 'store'
+        self.home.mkdir(mode=0o700)
+        self.store.mkdir()
+
+        run(
+            ['gpg', '--homedir', str(self.home), '--batch', '--passphrase', '', '--quick-gen-key', 'test <test@localhost>', 'future-default', 'default', 'never'],
+            check=True,
+            capture_output=True
+        )
+
+        self.values = {
+            self.store / 'text': b'some secret\n',
+            self.store / 'binary': b'\xff\xfe\x00binary\n'
+        }
+
+        for path, value in self.values.items():
+            path.write_bytes(value)
+
+        run(
+            ['gpg', '--homedir', str(self.home), '--batch', '--yes', '--trust-model', 'always', '-r', 'test@localhost', '--encrypt-files', *map(str, self.values)],
+            check=True,
+            capture_output=True
+        )
+
+        for path in self.values:
+            path.unlink()
+
+        self.expected = {
+            self.store / 'text': base64.b64encode(b'some secret').decode(),
+            self.store / 'binary': base64.b64encode(b'\xff\xfe\x00binary\n').decode()
+        }
+
+    def tearDown(self) -> None:
+        run(['gpgconf', '--homedir', str(self.home), '--kill', 'gpg-agent'], check=False)
+        env.update(self._env)
+        self._tmp.cleanup()
+
+    def decrypt(self) -> dict:
+        """
+        Decrypt the store's paths, and a path that doesn't exist.
+        """
+        return {
+            result.path: result.value
+            for result in gpg.decrypt_batch([*self.values, self.store / 'missing'], home=self.home, workers=2)
+        }
+
+    def test_process_pool_recovers(self) -> None:
+        """
+        A worker process dying should break the shared process pool for the job it was running only; the next batch
+        should start a new pool, rather than fail until the operator restarts.
+        """
+        env['PASS_DECRYPT_BACKEND'] = 'process'
+
+        broken = gpg._get_process_pool()
+
+        try:
+            with self.assertRaises(gpg.BrokenProcessPool):
+                broken.submit(os._exit, 1).result()
+
+            self.assertEqual(self.decrypt(), {**self.expected, self.store / 'missing': None})
+            self.assertIsNot(gpg._get_process_pool(), broken)
+        finally:
+            gpg._get_process_pool().shutdown()
+            gpg._process_pool = None
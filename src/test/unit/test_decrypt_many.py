@@ -0,0 +1,97 @@
+"""
+Verify that passoperator.gpg.decrypt_many decrypts pass store paths from the event loop.
+"""
+
+
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from subprocess import run
+from pathlib import Path
+from git import Repo
+
+from passoperator.gpg import decrypt_many
+from passoperator.store import Snapshot
+
+import asyncio
+import base64
+
+
+class DecryptMany(TestCase):
+    """
+    Test decrypting a throwaway password store with asyncio subprocesses.
+    """
+
+    def setUp(self) -> None:
+        """
+        Generate a GnuPG home with a fresh key and a small store encrypted to it.
+        """
+        self._tmp = TemporaryDirectory()
+        self.home = Path(self._tmp.name) / 'gnupg'
+        self.store = Path(self._tmp.name) / 'store'
+        self.home.mkdir(mode=0o700)
+        self.store.mkdir()
+
+        run(
+            ['gpg', '--homedir', str(self.home), '--batch', '--passphrase', '', '--quick-gen-key', 'test <test@localhost>', 'future-default', 'default', 'never'],
+            check=True,
+            capture_output=True
+        )
+
+        self.values = {
+            self.store / 'text': b'some secret\n',
+            self.store / 'binary': b'\xff\xfe\x00binary\n'
+        }
+
+        for path, value in self.values.items():
+            path.write_bytes(value)
+
+        run(
+            ['gpg', '--homedir', str(self.home), '--batch', '--yes', '--trust-model', 'always', '-r', 'test@localhost', '--encrypt-files', *map(str, self.values)],
+            check=True,
+            capture_output=True
+        )
+
+        for path in self.values:
+            path.unlink()
+
+    def tearDown(self) -> None:
+        run(['gpgconf', '--homedir', str(self.home), '--kill', 'gpg-agent'], check=False)
+        self._tmp.cleanup()
+
+    def test_decrypt_many(self) -> None:
+        """
+        Every path should decrypt to its b64enc'ed value, with text trimmed and binary left intact, and paths that
+        don't exist should come back as None.
+        """
+        missing = self.store / 'missing'
+
+        decrypted = asyncio.run(decrypt_many([*self.values, missing], home=self.home))
+
+        self.assertEqual(decrypted[self.store / 'text'], base64.b64encode(b'some secret').decode())
+        self.assertEqual(decrypted[self.store / 'binary'], base64.b64encode(b'\xff\xfe\x00binary\n').decode())
+        self.assertIsNone(decrypted[missing])
+
+    def test_decrypt_many_from_snapshot(self) -> None:
+        """
+        Paths should decrypt from a snapshot of the store's git object database, without a working tree, at the
+        commit the snapshot is pinned to.
+        """
+        encrypted = {path: Path(f'{path}.gpg').read_bytes() for path in self.values}
+
+        repo = Repo.init(self.store, initial_branch='main')
+        repo.index.add([f'{path.name}.gpg' for path in self.values])
+        commit = repo.index.commit('store').hexsha
+
+        for path in self.values:
+            Path(f'{path}.gpg').unlink()
+
+        Path(self.store / 'text.gpg').write_bytes(encrypted[self.store / 'binary'])
+
+        store = Snapshot.at(commit, directory=str(self.store))
+        decrypted = asyncio.run(decrypt_many(self.values, home=self.home, store=store))
+
+        self.assertEqual(decrypted[self.store / 'text'], base64.b64encode(b'some secret').decode())
+        self.assertEqual(decrypted[self.store / 'binary'], base64.b64encode(b'\xff\xfe\x00binary\n').decode())
+
+        store.close()
+        repo.close()
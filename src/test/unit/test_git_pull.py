@@ -0,0 +1,137 @@
+"""
+Verify that passoperator.git.pull syncs a store on the event loop, signals each completed pull, survives failures
+other than git's, and stops cleanly when it's cancelled.
+"""
+
+
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from git import Repo
+
+from passoperator.stores import Store
+from passoperator import env, git
+
+import asyncio
+
+
+class AsyncPull(IsolatedAsyncioTestCase):
+    """
+    Test pulling a throwaway store.
+    """
+
+    def setUp(self) -> None:
+        """
+        Commit a small store and clone it.
+        """
+        self._tmp = TemporaryDirectory()
+        self._env = env.copy()
+        env['PASS_GIT_PULL_INTERVAL'] = '60'
+
+        self.source = Repo.init(Path(self._tmp.name) / 'source', initial_branch='main')
+        self.root = Path(self.source.working_dir)
+        self.first = self.commit({'.gpg-id': b'key\n', 'team/a.gpg': b'a'})
+
+        self.store = Store(
+            'test', str(self.root), 'main', str(Path(self._tmp.name) / 'clone'), Path(self._tmp.name) / 'gnupg', 'key'
+        )
+        git.clone(self.store)
+
+    def tearDown(self) -> None:
+        self.source.close()
+        self._tmp.cleanup()
+        env.update(self._env)
+
+    def commit(self, files: dict) -> str:
+        """
+        Write and commit files to the source repository.
+        """
+        for path, contents in files.items():
+            (self.root / path).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / path).write_bytes(contents)
+
+        self.source.index.add(list(files))
+
+        return self.source.index.commit('update').hexsha
+
+    async def test_pull_completes(self) -> None:
+        """
+        A requested pull should fetch the new commit, publish it, notify listeners, and wake whatever's waiting on
+        the pull with the new HEAD.
+        """
+        moved = []
+        listener = git.on_head_change(lambda store, old, new: moved.append((old, new)))
+
+        try:
+            task = asyncio.create_task(git.pull(self.store, daemon=True))
+            self.assertEqual(await asyncio.wait_for(git.wait_for_pull(self.store), timeout=10), self.first)
+
+            second = self.commit({'team/a.gpg': b'edited'})
+            env['PASS_WEBHOOK_DEBOUNCE'] = '0'
+            git.request_pull(self.store)
+
+            self.assertEqual(await asyncio.wait_for(git.wait_for_pull(self.store), timeout=10), second)
+            self.assertEqual(moved, [(self.first, second)])
+            self.assertEqual(self.store.snapshots.stats()['commit'], second)
+        finally:
+            git._head_change_listeners.remove(listener)
+
+        task.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_survives_failures(self) -> None:
+        """
+        A pull that fails to publish should be retried, and publish the commit it fetched, rather than end the pull
+        loop; a listener that fails shouldn't fail the pull.
+        """
+        env['PASS_GIT_BACKOFF_BASE'] = '0'
+        env['PASS_WEBHOOK_DEBOUNCE'] = '0'
+
+        def broken(store, old, new):
+            raise KeyError('spec')
+
+        listener = git.on_head_change(broken)
+        publish = self.store.snapshots.publish
+        failures = [OSError('fork failed')]
+
+        def flaky(commit, directory):
+            if failures:
+                raise failures.pop()
+
+            return publish(commit, directory)
+
+        try:
+            task = asyncio.create_task(git.pull(self.store, daemon=True))
+            await asyncio.wait_for(git.wait_for_pull(self.store), timeout=10)
+
+            second = self.commit({'team/a.gpg': b'edited'})
+
+            with patch.object(self.store.snapshots, 'publish', side_effect=flaky):
+                git.request_pull(self.store)
+                self.assertEqual(await asyncio.wait_for(git.wait_for_pull(self.store), timeout=10), second)
+
+            self.assertEqual(self.store.snapshots.commit, second)
+            self.assertEqual(self.store.scheduler.failures, 0)
+            self.assertFalse(task.done())
+        finally:
+            git._head_change_listeners.remove(listener)
+
+        task.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_cancel_while_waiting(self) -> None:
+        """
+        Cancelling the pull loop between pulls should stop it right away, rather than once its interval is up.
+        """
+        task = asyncio.create_task(git.pull(self.store, daemon=True))
+        await asyncio.wait_for(git.wait_for_pull(self.store), timeout=10)
+
+        task.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await asyncio.wait_for(task, timeout=1)
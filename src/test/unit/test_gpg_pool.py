@@ -0,0 +1,60 @@
+"""
+Verify that passoperator.gpg.GPGPool reuses contexts and respects its capacity.
+"""
+
+
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from threading import Thread
+from pathlib import Path
+
+from passoperator.gpg import GPGPool
+
+
+class GPGPoolReuse(TestCase):
+    """
+    Test checking GPG contexts in and out of the pool.
+    """
+
+    def setUp(self) -> None:
+        """
+        Create a temporary GnuPG home for the pool's contexts.
+        """
+        self._home = TemporaryDirectory()
+        self.home = Path(self._home.name) / 'gnupg'
+
+    def tearDown(self) -> None:
+        self._home.cleanup()
+
+    def test_context_is_reused(self) -> None:
+        """
+        Sequential checkouts of the same home should create a single context.
+        """
+        pool = GPGPool(maxsize=2)
+
+        with pool.context(self.home) as first:
+            pass
+
+        with pool.context(self.home) as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()['created'], 1)
+        self.assertEqual(pool.stats()['reused'], 1)
+
+    def test_pool_is_bounded(self) -> None:
+        """
+        A full pool should block new checkouts until a context is returned, rather than create another.
+        """
+        pool = GPGPool(maxsize=1)
+        contexts = []
+
+        with pool.context(self.home) as held:
+            waiter = Thread(target=lambda: contexts.append(pool._acquire(self.home)))
+            waiter.start()
+            waiter.join(timeout=0.5)
+            self.assertTrue(waiter.is_alive())
+
+        waiter.join(timeout=5)
+        self.assertEqual(contexts, [held])
+        self.assertEqual(pool.stats()['created'], 1)
@@ -0,0 +1,77 @@
+"""
+Verify that passoperator.kube.ApiClientPool shares one ApiClient between the APIs it hands out, applies its default
+timeouts and keep-alive, and reports when every pooled connection is in use.
+"""
+
+
+from unittest import TestCase
+from unittest.mock import patch
+from kubernetes import client
+from urllib3.exceptions import EmptyPoolError
+
+from passoperator.kube import ApiClientPool
+
+import socket
+
+
+class ApiClientPooling(TestCase):
+    """
+    Test the shared API client.
+    """
+
+    def setUp(self) -> None:
+        self.pool = ApiClientPool(maxsize=1, keepalive=30, timeout=(1, 2))
+
+    def tearDown(self) -> None:
+        self.pool.close()
+
+    def test_shared(self) -> None:
+        """
+        Every API should be bound to the same ApiClient, whose connections are kept alive and block when the pool is
+        exhausted.
+        """
+        self.assertIs(self.pool.core().api_client, self.pool.custom().api_client)
+
+        pool_kw = self.pool.api_client().rest_client.pool_manager.connection_pool_kw
+
+        self.assertEqual(pool_kw['maxsize'], 1)
+        self.assertTrue(pool_kw['block'])
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), pool_kw['socket_options'])
+
+    def test_saturation(self) -> None:
+        """
+        Requests should default to the pool's timeouts, and a request made while every connection is in use should be
+        counted as saturated.
+        """
+        timeouts = []
+
+        def call_api(api_client, *args, **kwargs):
+            timeouts.append(kwargs['_request_timeout'])
+
+            # Make a second request while the first is still in flight.
+            if len(timeouts) == 1:
+                api_client.call_api('/api/v1/secrets', 'GET', _request_timeout=5)
+
+        with patch.object(client.ApiClient, 'call_api', autospec=True, side_effect=call_api):
+            self.pool.api_client().call_api('/api/v1/secrets', 'GET', _request_timeout=None)
+
+        self.assertEqual(timeouts, [(1, 2), 5])
+        self.assertEqual(
+            {key: value for key, value in self.pool.stats().items() if key != 'connections'},
+            {'maxsize': 1, 'in_flight': 0, 'peak': 2, 'requests': 2, 'saturated': 1, 'saturation': 0.0}
+        )
+
+    def test_pool_timeout(self) -> None:
+        """
+        A request that finds every pooled connection checked out should give up after the connect timeout, rather
+        than wait forever.
+        """
+        self.pool.timeout = (0.1, 2)
+        pool = self.pool.api_client().rest_client.pool_manager.connection_from_url('https://127.0.0.1:6443')
+        connection = pool._get_conn()
+
+        try:
+            with self.assertRaises(EmptyPoolError):
+                pool._get_conn()
+        finally:
+            pool._put_conn(connection)
@@ -0,0 +1,59 @@
+"""
+Verify that passoperator.daemon.lookup_managing_passsecret finds the PassSecret managing a Secret through kopf's index,
+without calling the API server or decrypting anything.
+"""
+
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from passoperator.reverse_index import passsecrets
+from passoperator import daemon
+
+
+class LookupManagingPassSecret(TestCase):
+    """
+    Test looking up PassSecrets by their managed Secret.
+    """
+
+    def setUp(self) -> None:
+        self.body = {
+            'metadata': {
+                'name': 'a',
+                'namespace': 'default'
+            },
+            'spec': {
+                'encryptedData': {
+                    'key': 'team/a'
+                },
+                'managedSecret': {
+                    'metadata': {
+                        'name': 'managed-a',
+                        'namespace': 'apps'
+                    }
+                }
+            }
+        }
+
+        passsecrets.update(self.body)
+
+    def tearDown(self) -> None:
+        passsecrets.remove(self.body)
+
+    def test_lookup(self) -> None:
+        """
+        The index should map the managed Secret to its PassSecret's raw body, and Secrets nothing manages to None.
+        """
+        index = daemon.managed_secret_index(body=self.body)
+        self.assertEqual(index, {('apps', 'managed-a'): ('default', 'a')})
+
+        # Kopf's index holds every value indexed under a key.
+        index = {key: [value] for key, value in index.items()}
+
+        with patch.object(daemon.client, 'CustomObjectsApi') as api, \
+                patch.object(daemon.PassSecret, 'from_kopf') as from_kopf:
+            self.assertEqual(daemon.lookup_managing_passsecret(index, 'managed-a', 'apps'), self.body)
+            self.assertIsNone(daemon.lookup_managing_passsecret(index, 'managed-a'))
+
+            api.assert_not_called()
+            from_kopf.assert_not_called()
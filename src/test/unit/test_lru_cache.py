@@ -0,0 +1,87 @@
+"""
+Verify that passoperator.cache.LRUCache evicts by byte budget, recency and age.
+"""
+
+
+from unittest import TestCase
+from time import sleep
+
+from passoperator.cache import LRUCache
+
+
+class LRUCacheEviction(TestCase):
+    """
+    Test LRUCache eviction policies.
+    """
+
+    def test_evicts_least_recently_used(self) -> None:
+        """
+        Inserting past the byte budget should evict the least-recently used entries first.
+        """
+        cache = LRUCache(maxbytes=10)
+
+        cache.put('a', 'aaaa')
+        cache.put('b', 'bbbb')
+        self.assertEqual(cache.get('a'), 'aaaa')
+
+        cache.put('c', 'cccc')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'aaaa')
+        self.assertEqual(cache.get('c'), 'cccc')
+        self.assertEqual(cache.stats()['bytes'], 8)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_oversized_values_are_not_cached(self) -> None:
+        """
+        A value larger than the whole budget should not flush the cache.
+        """
+        cache = LRUCache(maxbytes=4)
+
+        cache.put('a', 'aaaa')
+        cache.put('b', 'bbbbbbbb')
+
+        self.assertEqual(cache.get('a'), 'aaaa')
+        self.assertIsNone(cache.get('b'))
+
+    def test_ttl_expiry(self) -> None:
+        """
+        Entries older than the TTL should be treated as misses.
+        """
+        cache = LRUCache(maxbytes=10, ttl=0.05)
+
+        cache.put('a', 'aaaa')
+        self.assertEqual(cache.get('a'), 'aaaa')
+
+        sleep(0.1)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+    def test_retain(self) -> None:
+        """
+        Retaining a set of keys should drop every other entry.
+        """
+        cache = LRUCache(maxbytes=10)
+
+        cache.put('a', 'a')
+        cache.put('b', 'b')
+        cache.retain({'b', 'c'})
+
+        self.assertNotIn('a', cache)
+        self.assertIn('b', cache)
+
+    def test_discard(self) -> None:
+        """
+        Discarding a key should drop only that entry and release its bytes.
+        """
+        cache = LRUCache(maxbytes=10)
+
+        cache.put('a', 'aa')
+        cache.put('b', 'bbb')
+        cache.discard('a')
+        cache.discard('c')
+
+        self.assertNotIn('a', cache)
+        self.assertIn('b', cache)
+        self.assertEqual(cache.stats()['bytes'], 3)
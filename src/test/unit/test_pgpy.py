@@ -0,0 +1,102 @@
+"""
+Verify that passoperator.gpg decrypts pass store paths in-process with PGPy when the 'pgpy' backend is configured, and
+falls back to gpg when it can't.
+"""
+
+
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+from passoperator import env, gpg
+
+import base64
+import warnings
+
+try:
+    import pgpy
+    from pgpy.constants import PubKeyAlgorithm, KeyFlags, HashAlgorithm, SymmetricKeyAlgorithm, CompressionAlgorithm
+except ImportError:
+    pgpy = None
+
+
+@skipIf(pgpy is None, 'PGPy is not installed')
+class InProcessDecryption(TestCase):
+    """
+    Test decrypting a throwaway password store with a key loaded into PGPy.
+    """
+
+    def setUp(self) -> None:
+        """
+        Generate a key with PGPy, and a small store encrypted to it.
+        """
+        self._tmp = TemporaryDirectory()
+        self._env = env.copy()
+        env['PASS_DECRYPT_BACKEND'] = 'pgpy'
+
+        self.home = Path(self._tmp.name) / 'gnupg'
+        self.store = Path(self._tmp.name) / 'store'
+        self.store.mkdir()
+
+        self.key = pgpy.PGPKey.new(PubKeyAlgorithm.RSAEncryptOrSign, 1024)
+        self.key.add_uid(
+            pgpy.PGPUID.new('test', email='test@localhost'),
+            usage={KeyFlags.Sign, KeyFlags.EncryptCommunications},
+            hashes=[HashAlgorithm.SHA256],
+            ciphers=[SymmetricKeyAlgorithm.AES256],
+            compression=[CompressionAlgorithm.Uncompressed]
+        )
+
+        self.values = {
+            self.store / 'text': b'some secret\n',
+            self.store / 'binary': b'\xff\xfe\x00binary\n'
+        }
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+
+            for path, value in self.values.items():
+                Path(f'{path}.gpg').write_bytes(bytes(self.key.pubkey.encrypt(pgpy.PGPMessage.new(value, file=True))))
+
+    def tearDown(self) -> None:
+        gpg._in_process_keys.pop(str(self.home), None)
+        env.update(self._env)
+        self._tmp.cleanup()
+
+    def test_decrypt_in_process(self) -> None:
+        """
+        Paths should decrypt in-process to their b64enc'ed value, with text trimmed and binary left intact, and paths
+        PGPy can't decrypt should be left to gpg.
+        """
+        missing = self.store / 'missing'
+
+        self.assertTrue(gpg.load_private_key(base64.b64encode(str(self.key).encode()).decode(), '', home=self.home))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            decrypted, remaining = gpg._decrypt_in_process([*self.values, missing], home=self.home)
+
+        self.assertEqual(
+            {result.path: result.value for result in decrypted},
+            {
+                self.store / 'text': base64.b64encode(b'some secret').decode(),
+                self.store / 'binary': base64.b64encode(b'\xff\xfe\x00binary\n').decode()
+            }
+        )
+        self.assertEqual(remaining, [missing])
+
+        # Keys are per GnuPG home, so another store's paths are left to gpg.
+        self.assertEqual(gpg._decrypt_in_process(list(self.values), home=Path(self._tmp.name) / 'other'), ([], list(self.values)))
+
+    def test_fallback(self) -> None:
+        """
+        A key that can't be loaded, a public key, or PGPy missing altogether should leave every path to gpg.
+        """
+        self.assertFalse(gpg.load_private_key('not a key', '', home=self.home))
+        self.assertFalse(gpg.load_private_key(str(self.key.pubkey), '', home=self.home))
+
+        with patch.object(gpg, 'pgpy', None):
+            self.assertFalse(gpg.load_private_key(str(self.key), '', home=self.home))
+
+        self.assertEqual(gpg._decrypt_in_process(list(self.values), home=self.home), ([], list(self.values)))
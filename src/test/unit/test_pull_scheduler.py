@@ -0,0 +1,71 @@
+"""
+Verify that passoperator.git.PullScheduler backs off failed pulls and reports a stale password store.
+"""
+
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from passoperator.git import PullScheduler
+from passoperator import env
+
+
+class PullBackoff(TestCase):
+    """
+    Test the delays between pulls, and the health of the store.
+    """
+
+    def setUp(self) -> None:
+        self._env = env.copy()
+        env.update({
+            'PASS_GIT_PULL_INTERVAL': '60',
+            'PASS_GIT_BACKOFF_BASE': '1',
+            'PASS_GIT_BACKOFF_CAP': '30',
+            'PASS_GIT_STALE_AFTER': '300'
+        })
+
+    def tearDown(self) -> None:
+        env.update(self._env)
+
+    def test_backoff(self) -> None:
+        """
+        Consecutive failures should double the backoff up to the cap, with every delay jittered between half and all
+        of it, and a success should go back to the pull interval.
+        """
+        scheduler = PullScheduler()
+        self.assertEqual(scheduler.delay(), 60)
+
+        backoffs = []
+
+        for _ in range(8):
+            scheduler.failed(0.1)
+            backoffs.append(scheduler.backoff())
+
+            for _ in range(100):
+                self.assertTrue(backoffs[-1] / 2 <= scheduler.delay() <= backoffs[-1])
+
+        self.assertEqual(backoffs, [1, 2, 4, 8, 16, 30, 30, 30])
+
+        scheduler.succeeded(0.1)
+        self.assertEqual(scheduler.failures, 0)
+        self.assertEqual(scheduler.delay(), 60)
+
+    def test_stale(self) -> None:
+        """
+        The store should be stale until its first successful pull, and again once PASS_GIT_STALE_AFTER seconds pass
+        without one, however many pulls fail in between.
+        """
+        scheduler = PullScheduler()
+        self.assertTrue(scheduler.stale())
+
+        with patch('passoperator.git.time', return_value=1000.0):
+            scheduler.succeeded(0.5)
+
+        with patch('passoperator.git.time', return_value=1200.0):
+            scheduler.failed(0.5)
+            self.assertFalse(scheduler.stale())
+
+        with patch('passoperator.git.time', return_value=1301.0):
+            stats = scheduler.stats()
+
+        self.assertEqual(stats, {'failures': 1, 'last_success': 1000.0, 'last_duration': 0.5, 'backoff': 1.0, 'stale': True})
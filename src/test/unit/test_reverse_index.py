@@ -0,0 +1,125 @@
+"""
+Verify that passoperator.reverse_index.ReverseIndex maps store paths to the PassSecrets that refer to them.
+"""
+
+
+from typing import Any, Dict
+from unittest import TestCase
+
+from passoperator.reverse_index import ReverseIndex
+
+
+def passsecret(name: str, generation: int = 1, store: str | None = None, **encryptedData: str) -> Dict[str, Any]:
+    """
+    Build a minimal PassSecret body.
+    """
+    body: Dict[str, Any] = {
+        'metadata': {
+            'name': name,
+            'namespace': 'default',
+            'generation': generation
+        },
+        'spec': {
+            'encryptedData': encryptedData,
+            'managedSecret': {
+                'metadata': {
+                    'name': name
+                }
+            }
+        }
+    }
+
+    if store is not None:
+        body['spec']['store'] = store
+
+    return body
+
+
+class ReverseIndexLookup(TestCase):
+    """
+    Test looking up and tracking PassSecrets by store path.
+    """
+
+    def test_affected(self) -> None:
+        """
+        Only PassSecrets that refer to a changed path should be affected, whether or not the path has a .gpg suffix.
+        """
+        index = ReverseIndex()
+
+        index.update(passsecret('a', key='team/a'))
+        index.update(passsecret('b', key='team/b', shared='team/shared'))
+        index.update(passsecret('c', key='team/shared'))
+
+        self.assertEqual([body['metadata']['name'] for body in index.affected({'team/a.gpg'})], ['a'])
+        self.assertEqual(sorted(body['metadata']['name'] for body in index.affected({'team/shared.gpg'})), ['b', 'c'])
+        self.assertEqual(index.affected({'team/unreferenced.gpg'}), [])
+
+    def test_affected_by_store(self) -> None:
+        """
+        The same path in different stores refers to different files, so a change in one store should only affect the
+        PassSecrets that select it.
+        """
+        index = ReverseIndex()
+
+        index.update(passsecret('a', key='team/a'))
+        index.update(passsecret('b', store='other', key='team/a'))
+
+        self.assertEqual([body['metadata']['name'] for body in index.affected({'team/a.gpg'})], ['a'])
+        self.assertEqual([body['metadata']['name'] for body in index.affected({'team/a.gpg'}, 'other')], ['b'])
+        self.assertEqual(index.affected({'team/a.gpg'}, 'missing'), [])
+
+    def test_update_and_remove(self) -> None:
+        """
+        Updating a PassSecret should move it between paths, and removing it should drop its paths.
+        """
+        index = ReverseIndex()
+
+        index.update(passsecret('a', key='team/a'))
+        index.update(passsecret('a', key='team/b'))
+
+        self.assertEqual(index.affected({'team/a.gpg'}), [])
+        self.assertEqual(len(index.affected({'team/b.gpg'})), 1)
+
+        index.remove(passsecret('a'))
+
+        self.assertEqual(index.affected({'team/b.gpg'}), [])
+        self.assertEqual(index.stats(), {'passsecrets': 0, 'paths': 0, 'dirty': 0})
+
+    def test_is_current(self) -> None:
+        """
+        A reconciled PassSecret should be current until a path it refers to changes, its spec changes, or its
+        managed Secret's data changes.
+        """
+        index = ReverseIndex()
+        body = passsecret('a', key='team/a')
+        data = {'key': 'dmFsdWU='}
+
+        index.update(body)
+        self.assertFalse(index.is_current(body, data))
+
+        index.reconciled(body, data, index.changes(body))
+        self.assertTrue(index.is_current(body, data))
+        self.assertFalse(index.is_current(body, {'key': 'ZWRpdGVk'}))
+        self.assertFalse(index.is_current(passsecret('a', generation=2, key='team/a'), data))
+
+        index.affected({'team/a.gpg'})
+        self.assertFalse(index.is_current(body, data))
+
+    def test_changed_while_reconciling(self) -> None:
+        """
+        A PassSecret should stay dirty if a path it refers to changes while it's being reconciled, as the reconcile may
+        have decrypted the path's old contents.
+        """
+        index = ReverseIndex()
+        body = passsecret('a', key='team/a')
+        data = {'key': 'dmFsdWU='}
+
+        index.update(body)
+        changes = index.changes(body)
+
+        index.affected({'team/a.gpg'})
+        index.reconciled(body, data, changes)
+        self.assertFalse(index.is_current(body, data))
+
+        index.reconciled(body, data, index.changes(body))
+        self.assertTrue(index.is_current(body, data))
@@ -0,0 +1,114 @@
+"""
+Verify that passoperator.store.Snapshot reads the password store at a pinned commit from git's object database, and
+that passoperator.store.Snapshots frees superseded snapshots once they've been read.
+"""
+
+
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from git import Repo
+
+from passoperator.store import Snapshot, Snapshots
+
+import pickle
+
+
+class SnapshotRead(TestCase):
+    """
+    Test reading files from a snapshot of a throwaway store.
+    """
+
+    def setUp(self) -> None:
+        """
+        Commit a small store, then clone it bare, so there's no working tree to read from.
+        """
+        self._tmp = TemporaryDirectory()
+        self.source = Repo.init(Path(self._tmp.name) / 'source', initial_branch='main')
+        self.root = Path(self.source.working_dir)
+
+        self.first = self.commit({'.gpg-id': b'key\n', 'team/a.gpg': b'\x85\x01a\n', 'team/b.gpg': b'b'})
+        self.second = self.commit({'team/a.gpg': b'\x85\x01edited'})
+
+        self.bare = Repo.clone_from(str(self.root), Path(self._tmp.name) / 'bare', bare=True)
+
+    def tearDown(self) -> None:
+        self.source.close()
+        self.bare.close()
+        self._tmp.cleanup()
+
+    def commit(self, files: dict) -> str:
+        """
+        Write and commit files to the source repository.
+        """
+        for path, contents in files.items():
+            (self.root / path).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / path).write_bytes(contents)
+
+        self.source.index.add(list(files))
+
+        return self.source.index.commit('update').hexsha
+
+    def test_read_pinned_commit(self) -> None:
+        """
+        Snapshots should read each file's bytes, untouched, as they were at their commit, and resolve absolute and
+        relative pass store paths alike.
+        """
+        directory = self.bare.git_dir
+        first = Snapshot.at(self.first, directory=directory)
+        head = Snapshot.at(directory=directory)
+
+        self.assertEqual(head.commit, self.second)
+        self.assertEqual(first.read('team/a'), b'\x85\x01a\n')
+        self.assertEqual(head.read(f'{directory}/team/a'), b'\x85\x01edited')
+        self.assertEqual(head.read('/team/b'), b'b')
+        self.assertEqual(head.read('.gpg-id', suffix=''), b'key\n')
+
+        self.assertNotEqual(first.blob_id('team/a'), head.blob_id('team/a'))
+        self.assertEqual(first.blob_id('team/b'), head.blob_id('team/b'))
+        self.assertEqual(len(head.blob_ids(suffix='.gpg')), 2)
+
+        with self.assertRaises(FileNotFoundError):
+            head.read('team/missing')
+
+        first.close()
+        head.close()
+
+    def test_pickle(self) -> None:
+        """
+        Snapshots should survive being handed to another process.
+        """
+        head = pickle.loads(pickle.dumps(Snapshot.at(directory=self.bare.git_dir)))
+
+        self.assertEqual(head.read('team/b'), b'b')
+
+        head.close()
+
+    def test_publish_and_free(self) -> None:
+        """
+        Readers of a superseded snapshot should keep reading it, pinned, until they release it, and new readers should
+        get the published snapshot without waiting on them.
+        """
+        directory = self.bare.git_dir
+        published = Snapshots()
+
+        with published.acquire() as empty:
+            self.assertEqual(empty.blobs, {})
+
+        published.publish(self.first, directory=directory)
+
+        with published.acquire() as first:
+            published.publish(self.second, directory=directory)
+
+            with published.acquire() as second:
+                self.assertEqual(second.commit, self.second)
+                self.assertEqual(published.stats(), {'commit': self.second, 'snapshots': 2, 'readers': 2})
+
+            self.assertEqual(first.read('team/a'), b'\x85\x01a\n')
+            self.assertIn(self.first, self.bare.git.for_each_ref('refs/passoperator/', format='%(objectname)'))
+
+        self.assertEqual(published.stats(), {'commit': self.second, 'snapshots': 1, 'readers': 0})
+        self.assertEqual(self.bare.git.for_each_ref('refs/passoperator/', format='%(objectname)'), self.second)
+
+        # Publishing the current commit again is a no-op.
+        self.assertIs(published.publish(self.second, directory=directory), second)
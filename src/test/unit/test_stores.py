@@ -0,0 +1,61 @@
+"""
+Verify that passoperator.stores defines the default store from the environment, and any others from PASS_STORES.
+"""
+
+
+from unittest import TestCase
+
+from passoperator.stores import DEFAULT_STORE, Store, load_stores
+from passoperator import env
+
+import json
+
+
+class StoreConfiguration(TestCase):
+    """
+    Test parsing store configuration.
+    """
+
+    def setUp(self) -> None:
+        self._env = env.copy()
+
+    def tearDown(self) -> None:
+        env.update(self._env)
+
+    def test_load_stores(self) -> None:
+        """
+        Stores in PASS_STORES should be defined alongside the default store, each with its own directory and GnuPG
+        home.
+        """
+        env['PASS_STORES'] = json.dumps({
+            'team-a': {
+                'url': 'git@example.com:team-a.git',
+                'keyId': 'team-a@example.com',
+                'keyFile': '/etc/pass-operator/stores/team-a/key'
+            }
+        })
+
+        stores = load_stores()
+
+        self.assertEqual(sorted(stores), [DEFAULT_STORE, 'team-a'])
+        self.assertEqual(stores['team-a'].branch, 'main')
+        self.assertEqual(stores[DEFAULT_STORE].directory, env['PASS_DIRECTORY'])
+        self.assertNotEqual(stores['team-a'].directory, stores[DEFAULT_STORE].directory)
+        self.assertNotEqual(stores['team-a'].home, stores[DEFAULT_STORE].home)
+
+    def test_invalid_stores(self) -> None:
+        """
+        Stores should be rejected if they're missing required fields, or their names aren't DNS labels other than
+        the default store's.
+        """
+        with self.assertRaises(ValueError):
+            Store.from_config('team-a', {'url': 'git@example.com:team-a.git'})
+
+        for name in (DEFAULT_STORE, 'Team_A', ''):
+            with self.assertRaises(ValueError):
+                Store.from_config(name, {'url': 'git@example.com:team-a.git', 'keyId': 'team-a@example.com'})
+
+        env['PASS_STORES'] = json.dumps(['team-a'])
+
+        with self.assertRaises(ValueError):
+            load_stores()
@@ -0,0 +1,185 @@
+"""
+Verify that passoperator.daemon.sweep reconciles every PassSecret with a handful of API calls, decrypting each path
+once and only writing the managed Secrets that changed, that passoperator.daemon.reconciliation adopts managed Secrets
+written before they were labelled, and that passoperator.informer.SecretInformer serves the Secrets of watched
+namespaces from memory.
+"""
+
+
+from typing import Any, Dict
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from kubernetes import client
+
+from passoperator.reverse_index import passsecrets
+from passoperator.informer import SecretInformer, to_dict
+from passoperator.secret import MANAGED_LABEL
+from passoperator import daemon
+
+
+def passsecret(name: str, **encryptedData: str) -> Dict[str, Any]:
+    """
+    Build a minimal PassSecret body.
+    """
+    return {
+        'kind': 'PassSecret',
+        'metadata': {
+            'name': name,
+            'namespace': 'default',
+            'generation': 1
+        },
+        'spec': {
+            'encryptedData': encryptedData,
+            'managedSecret': {
+                'metadata': {
+                    'name': name,
+                    'namespace': 'default'
+                }
+            }
+        }
+    }
+
+
+def secret(name: str, **data: str) -> client.V1Secret:
+    """
+    Build a labelled managed Secret.
+    """
+    return client.V1Secret(
+        metadata=client.V1ObjectMeta(name=name, namespace='default', labels={MANAGED_LABEL: 'true'}),
+        data=data
+    )
+
+
+class Sweep(TestCase):
+    """
+    Test sweeping PassSecrets against a mocked API.
+    """
+
+    def setUp(self) -> None:
+        self.bodies = [
+            passsecret('a', key='team/a', shared='team/shared'),
+            passsecret('b', key='team/shared'),
+            passsecret('c', key='team/c')
+        ]
+
+        for body in self.bodies:
+            passsecrets.update(body)
+
+        self.core = MagicMock()
+        self.core.create_namespaced_secret.side_effect = lambda namespace, body: body
+        self.core.patch_namespaced_secret.side_effect = lambda name, namespace, body: body
+
+        self.informer = SecretInformer()
+        self.informer.prime('default', [to_dict(secret('a', key='YQ==', shared='c2hhcmVk')), to_dict(secret('b', key='b2xk'))])
+
+        self.custom = MagicMock()
+        self.custom.list_namespaced_custom_object.return_value = {'items': self.bodies, 'metadata': {}}
+
+    def tearDown(self) -> None:
+        for body in self.bodies:
+            passsecrets.remove(body)
+
+    def test_sweep(self) -> None:
+        """
+        Paths should be decrypted once between every PassSecret, unchanged Secrets shouldn't be written, and missing
+        Secrets should be created, without reading a single Secret from the API server.
+        """
+        values = {'team/a': 'YQ==', 'team/shared': 'c2hhcmVk', 'team/c': 'Yw=='}
+
+        with patch.object(daemon.client, 'CoreV1Api', return_value=self.core), \
+                patch.object(daemon.client, 'CustomObjectsApi', return_value=self.custom), \
+                patch.object(daemon, 'managed_secrets', self.informer), \
+                patch.object(daemon, 'check_gpg_id'), \
+                patch.object(daemon.PassSecretSpec, 'decrypt_data', return_value=values) as decrypt_data:
+            stats = daemon.sweep()
+
+        decrypt_data.assert_called_once()
+        self.assertEqual(sorted(decrypt_data.call_args.args[0]), sorted(values))
+
+        self.assertEqual(stats, {'passsecrets': 3, 'stale': 3, 'decrypted': 3, 'created': 1, 'patched': 1})
+        self.core.list_namespaced_secret.assert_not_called()
+        self.core.read_namespaced_secret.assert_not_called()
+        self.assertEqual(self.core.create_namespaced_secret.call_args.kwargs['body'].metadata['name'], 'c')
+        self.assertEqual(self.core.patch_namespaced_secret.call_args.kwargs['name'], 'b')
+
+        # Writes go straight into the cache, so once they're reconciled, an unchanged store has nothing for any of them.
+        self.assertEqual(self.informer.get('default', 'b')['data'], {'key': 'c2hhcmVk'})
+
+        with patch.object(daemon.client, 'CoreV1Api', return_value=self.core), \
+                patch.object(daemon.client, 'CustomObjectsApi', return_value=self.custom), \
+                patch.object(daemon, 'managed_secrets', self.informer), \
+                patch.object(daemon.PassSecretSpec, 'decrypt_data') as decrypt_data:
+            stats = daemon.sweep()
+
+        decrypt_data.assert_not_called()
+        self.assertEqual(stats['stale'], 0)
+
+
+class Reconciliation(TestCase):
+    """
+    Test reconciling a PassSecret on its timer.
+    """
+
+    def setUp(self) -> None:
+        self.body = passsecret('a', key='team/a')
+        passsecrets.update(self.body)
+
+    def tearDown(self) -> None:
+        passsecrets.remove(self.body)
+
+    def test_unlabelled(self) -> None:
+        """
+        A managed Secret written before Secrets were labelled isn't cached, so creating it conflicts. It should be
+        read and patched instead, which labels it, rather than failing on every tick.
+        """
+        unlabelled = client.V1Secret(metadata=client.V1ObjectMeta(name='a', namespace='default'), data={'key': 'YQ=='})
+
+        core = MagicMock()
+        core.create_namespaced_secret.side_effect = client.ApiException(status=409)
+        core.read_namespaced_secret.return_value = unlabelled
+        core.patch_namespaced_secret.side_effect = lambda name, namespace, body: body
+
+        informer = SecretInformer()
+        informer.prime('default', [])
+
+        with patch.object(daemon.client, 'CoreV1Api', return_value=core), \
+                patch.object(daemon, 'managed_secrets', informer), \
+                patch.object(daemon, 'get_store'), \
+                patch.object(daemon, 'check_gpg_id'), \
+                patch.object(daemon.PassSecretSpec, 'decrypt_data', return_value={'key': 'YQ=='}):
+            daemon.reconciliation(body=self.body)
+
+        core.read_namespaced_secret.assert_called_once()
+        self.assertEqual(
+            core.patch_namespaced_secret.call_args.kwargs['body'].metadata['labels'][MANAGED_LABEL], 'true'
+        )
+        self.assertEqual(informer.get('default', 'a')['metadata']['labels'], {MANAGED_LABEL: 'true'})
+
+
+class Informer(TestCase):
+    """
+    Test looking up managed Secrets.
+    """
+
+    def test_get(self) -> None:
+        """
+        Secrets in watched namespaces should be served from the cache, missing or not, and the rest read from the
+        API server.
+        """
+        informer = SecretInformer()
+        informer.prime('default', [to_dict(secret('a', key='YQ=='))])
+        core = MagicMock()
+        core.read_namespaced_secret.return_value = secret('b')
+
+        with patch('passoperator.informer.client.CoreV1Api', return_value=core):
+            self.assertEqual(informer.get('default', 'a')['data'], {'key': 'YQ=='})
+            self.assertIsNone(informer.get('default', 'b'))
+            core.read_namespaced_secret.assert_not_called()
+
+            self.assertEqual(informer.get('other', 'b')['metadata']['name'], 'b')
+            core.read_namespaced_secret.assert_called_once()
+
+        informer.remove('default', 'a')
+        informer.update(to_dict(secret('c')) | {'metadata': {'name': 'c', 'namespace': 'other'}})
+
+        self.assertEqual(informer.stats(), {'secrets': 0, 'namespaces': 1, 'hits': 2, 'misses': 1})
@@ -0,0 +1,110 @@
+"""
+Verify that passoperator.webhook only requests pulls for authenticated pushes to a store's branch.
+"""
+
+
+from unittest import IsolatedAsyncioTestCase
+from pathlib import Path
+from aiohttp.test_utils import TestClient, TestServer
+
+from passoperator.webhook import verify_signature
+from passoperator.server import application
+from passoperator.stores import DEFAULT_STORE, Store, stores
+from passoperator import env
+
+import hashlib
+import hmac
+import json
+
+
+SECRET = 'webhook-secret'
+
+
+def sign(payload: bytes) -> str:
+    """
+    Sign a payload the way GitHub does.
+    """
+    return 'sha256=' + hmac.new(SECRET.encode('utf-8'), payload, hashlib.sha256).hexdigest()
+
+
+class WebhookAuthentication(IsolatedAsyncioTestCase):
+    """
+    Test the push webhook endpoint.
+    """
+
+    async def asyncSetUp(self) -> None:
+        """
+        Serve the webhook application on a test server.
+        """
+        self._secret = env['PASS_WEBHOOK_SECRET']
+        env['PASS_WEBHOOK_SECRET'] = SECRET
+
+        self.default = stores[DEFAULT_STORE]
+        self.default.pull_requested.clear()
+
+        self.other = stores['other'] = Store('other', 'git@example.com:other.git', 'release', '/tmp/other', Path('/tmp/other-gnupg'), 'other')
+
+        self.client = TestClient(TestServer(application()))
+        await self.client.start_server()
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        env['PASS_WEBHOOK_SECRET'] = self._secret
+        self.default.pull_requested.clear()
+        del stores['other']
+
+    def test_verify_signature(self) -> None:
+        """
+        Signatures should verify with or without the 'sha256=' prefix, and never without a secret.
+        """
+        payload = b'{}'
+
+        self.assertTrue(verify_signature(SECRET, payload, sign(payload)))
+        self.assertTrue(verify_signature(SECRET, payload, sign(payload).removeprefix('sha256=')))
+        self.assertFalse(verify_signature(SECRET, b'{"tampered": true}', sign(payload)))
+        self.assertFalse(verify_signature('', payload, sign(payload)))
+
+    async def test_rejects_unsigned_push(self) -> None:
+        """
+        Pushes with a missing or invalid signature should be rejected without requesting a pull.
+        """
+        payload = json.dumps({'ref': f'refs/heads/{env["PASS_GIT_BRANCH"]}'}).encode('utf-8')
+
+        response = await self.client.post('/webhook', data=payload)
+        self.assertEqual(response.status, 401)
+
+        response = await self.client.post('/webhook', data=payload, headers={'X-Hub-Signature-256': 'sha256=00'})
+        self.assertEqual(response.status, 401)
+
+        self.assertFalse(self.default.pull_requested.is_set())
+
+    async def test_push_to_branch_requests_pull(self) -> None:
+        """
+        A signed push to PASS_GIT_BRANCH should request a pull, and pushes to other branches should not.
+        """
+        other = json.dumps({'ref': 'refs/heads/some-other-branch'}).encode('utf-8')
+
+        response = await self.client.post('/webhook', data=other, headers={'X-Hub-Signature-256': sign(other)})
+        self.assertEqual(response.status, 202)
+        self.assertFalse(self.default.pull_requested.is_set())
+
+        push = json.dumps({'ref': f'refs/heads/{env["PASS_GIT_BRANCH"]}'}).encode('utf-8')
+
+        response = await self.client.post('/webhook', data=push, headers={'X-Hub-Signature-256': sign(push)})
+        self.assertEqual(response.status, 202)
+        self.assertTrue(self.default.pull_requested.is_set())
+
+    async def test_push_to_named_store(self) -> None:
+        """
+        A signed push to /webhook/{store} should only request a pull of that store, on that store's branch, and
+        pushes for stores that aren't configured should be rejected.
+        """
+        push = json.dumps({'ref': 'refs/heads/release'}).encode('utf-8')
+
+        response = await self.client.post('/webhook/other', data=push, headers={'X-Hub-Signature-256': sign(push)})
+        self.assertEqual(response.status, 202)
+        self.assertTrue(self.other.pull_requested.is_set())
+        self.assertFalse(self.default.pull_requested.is_set())
+
+        response = await self.client.post('/webhook/missing', data=push, headers={'X-Hub-Signature-256': sign(push)})
+        self.assertEqual(response.status, 404)